@@ -4,6 +4,7 @@ from datetime import datetime, date
 import zipfile
 import io
 import os
+from chat_system import segment_tables
 
 class AdminSystem:
     def __init__(self):
@@ -269,25 +270,31 @@ class AdminSystem:
                     error_count = 0
                     errors = []
 
-                    for _, row in df.iterrows():
-                        success, message = st.session_state.auth_manager.create_user(
-                            row['username'], row['password'], row['name'], 
-                            row['role'], row['club_name'], row['club_role']
-                        )
+                    rows = df[required_columns].to_dict('records')
+                    results = st.session_state.auth_manager.create_users(rows)
+                    welcomed = []
 
+                    for row, (success, message) in zip(rows, results):
                         if success:
                             success_count += 1
-                            # Add welcome notification
-                            st.session_state.notification_system.add_notification(
-                                "환영합니다!",
-                                "info",
-                                row['username'],
-                                f"{row['name']}님, 폴라리스반 동아리 시스템에 오신 것을 환영합니다!"
-                            )
+                            welcomed.append(row)
                         else:
                             error_count += 1
                             errors.append(f"{row['username']}: {message}")
 
+                    # Add welcome notifications in one write
+                    created_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    st.session_state.notification_system.add_notifications([
+                        st.session_state.notification_system.build_notification(
+                            "환영합니다!",
+                            "info",
+                            row['username'],
+                            f"{row['name']}님, 폴라리스반 동아리 시스템에 오신 것을 환영합니다!",
+                            created_date
+                        )
+                        for row in welcomed
+                    ])
+
                     st.success(f"✅ {success_count}명의 사용자가 성공적으로 추가되었습니다!")
 
                     if error_count > 0:
@@ -644,7 +651,11 @@ class AdminSystem:
                 st.write(f"📄 {file_name}")
 
             with col2:
-                df = st.session_state.data_manager.load_csv(file_key)
+                if file_key == 'chat_logs':
+                    # Every room's segment, as the single log it used to be
+                    df = st.session_state.chat_system.load_messages(include_deleted=True)
+                else:
+                    df = st.session_state.data_manager.load_csv(file_key)
                 csv_data = df.to_csv(index=False, encoding='utf-8-sig')
 
                 st.download_button(
@@ -743,17 +754,32 @@ class AdminSystem:
         # Automated system maintenance
         st.markdown("##### ⚙️ 자동 시스템 관리")
 
-        col1, col2 = st.columns(2)
+        col1, col2, col3 = st.columns(3)
 
         with col1:
             if st.button("🔔 과제 마감일 알림 확인", use_container_width=True):
-                st.session_state.notification_system.check_assignment_deadlines()
-                st.success("과제 마감일 알림을 확인했습니다!")
+                sent = st.session_state.notification_system.check_assignment_deadlines()
+                st.success(f"과제 마감일 알림을 확인했습니다! ({sent}건 발송)")
 
         with col2:
             if st.button("📅 일정 알림 확인", use_container_width=True):
-                st.session_state.notification_system.check_schedule_reminders()
-                st.success("일정 알림을 확인했습니다!")
+                sent = st.session_state.notification_system.check_schedule_reminders()
+                st.success(f"일정 알림을 확인했습니다! ({sent}건 발송)")
+
+        with col3:
+            if st.button("🧹 알림 정리", use_container_width=True):
+                report = st.session_state.notification_system.compact_notifications()
+                st.success(
+                    f"알림 {report['rows_before']}건 → {report['rows_after']}건 "
+                    f"(병합 {report['merged']}, 만료 {report['expired']}, 초과 {report['trimmed']}, 보관 {report['archived']})"
+                )
+                if report['bytes_before'] is not None:
+                    st.caption(f"용량: {report['bytes_before']:,} → {report['bytes_after']:,} bytes")
+                chat_report = st.session_state.chat_system.compact_messages()
+                st.success(
+                    f"채팅 {chat_report['rows_before']}건 → {chat_report['rows_after']}건 "
+                    f"(삭제된 메시지 보관 {chat_report['archived']}, 유예 중 {chat_report['tombstones_left']})"
+                )
 
     def show_admin_dashboard(self):
         """Display admin dashboard with statistics"""
@@ -817,6 +843,7 @@ class AdminSystem:
     def create_system_backup(self):
         """Create system backup ZIP file"""
         try:
+            data_manager = st.session_state.data_manager
             # Create ZIP file in memory
             zip_buffer = io.BytesIO()
 
@@ -826,13 +853,15 @@ class AdminSystem:
                     'users.csv', 'clubs.csv', 'posts.csv', 'chat_logs.csv',
                     'assignments.csv', 'submissions.csv', 'attendance.csv',
                     'schedule.csv', 'votes.csv', 'badges.csv', 'notifications.csv',
-                    'quizzes.csv', 'quiz_responses.csv', 'vote_responses.csv'
+                    'notification_reads.csv', 'notification_merges.csv', 'quizzes.csv', 'quiz_responses.csv',
+                    'vote_responses.csv'
                 ]
+                # One chat_logs__<room>.csv per chat room
+                data_files += [f'{table}.csv' for table in segment_tables(data_manager)]
 
+                # Read through the storage engine, so columnar and SQLite tables are included
                 for filename in data_files:
-                    file_path = f'data/{filename}'
-                    if os.path.exists(file_path):
-                        zip_file.write(file_path, filename)
+                    data_manager.export_table(zip_file, filename)
 
             zip_buffer.seek(0)
             return zip_buffer.getvalue()
@@ -844,29 +873,17 @@ class AdminSystem:
     def restore_system_backup(self, uploaded_file):
         """Restore system from backup ZIP file"""
         try:
-            # Extract ZIP file
+            data_manager = st.session_state.data_manager
             with zipfile.ZipFile(uploaded_file, 'r') as zip_file:
-                # Create temporary directory for extraction
-                temp_dir = 'temp_restore'
-                if not os.path.exists(temp_dir):
-                    os.makedirs(temp_dir)
-
-                zip_file.extractall(temp_dir)
-
-                # Move extracted files to data directory
+                # Written through the storage engine, so every backend sees the restored rows
                 for filename in zip_file.namelist():
-                    if filename.endswith('.csv'):
-                        source_path = os.path.join(temp_dir, filename)
-                        dest_path = os.path.join('data', filename)
-
-                        if os.path.exists(source_path):
-                            # Read and validate CSV
-                            df = pd.read_csv(source_path, encoding='utf-8-sig')
-                            df.to_csv(dest_path, index=False, encoding='utf-8-sig')
-
-                # Clean up temporary directory
-                import shutil
-                shutil.rmtree(temp_dir)
+                    if filename.endswith('.csv') and '/' not in filename:
+                        with zip_file.open(filename) as f:
+                            if not data_manager.import_table(filename, f):
+                                return False
+
+            # Partition a restored chat_logs.csv and drop buffers holding the replaced messages
+            st.session_state.chat_system.reload()
 
             return True
 
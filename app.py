@@ -13,7 +13,6 @@ from attendance_system import AttendanceSystem
 from schedule_system import ScheduleSystem
 from report_generator import ReportGenerator
 from vote_system import VoteSystem
-from gallery_system import GallerySystem
 from video_conference_system import VideoConferenceSystem
 from backup_system import BackupSystem
 from notification_system import NotificationSystem
@@ -21,6 +20,7 @@ from search_system import SearchSystem
 from admin_system import AdminSystem
 from ai_assistant import AIAssistant
 from gamification_system import GamificationSystem
+from reminder_scheduler import start_reminder_scheduler
 
 # Configure page
 st.set_page_config(
@@ -31,42 +31,46 @@ st.set_page_config(
 )
 
 # Initialize systems
-if 'auth_manager' not in st.session_state:
-    st.session_state.auth_manager = AuthManager()
-if 'data_manager' not in st.session_state:
-    st.session_state.data_manager = DataManager()
-if 'ui_components' not in st.session_state:
-    st.session_state.ui_components = UIComponents()
-if 'board_system' not in st.session_state:
-    st.session_state.board_system = BoardSystem()
-if 'chat_system' not in st.session_state:
-    st.session_state.chat_system = ChatSystem()
-if 'assignment_system' not in st.session_state:
-    st.session_state.assignment_system = AssignmentSystem()
-if 'quiz_system' not in st.session_state:
-    st.session_state.quiz_system = QuizSystem()
-if 'attendance_system' not in st.session_state:
-    st.session_state.attendance_system = AttendanceSystem()
-if 'schedule_system' not in st.session_state:
-    st.session_state.schedule_system = ScheduleSystem()
-if 'report_generator' not in st.session_state:
-    st.session_state.report_generator = ReportGenerator()
-if 'vote_system' not in st.session_state:
-    st.session_state.vote_system = VoteSystem()
-if 'notification_system' not in st.session_state:
-    st.session_state.notification_system = NotificationSystem()
-if 'search_system' not in st.session_state:
-    st.session_state.search_system = SearchSystem()
-if 'video_conference_system' not in st.session_state:
-    st.session_state.video_conference_system = VideoConferenceSystem()
-if 'backup_system' not in st.session_state:
-    st.session_state.backup_system = BackupSystem()
-if 'admin_system' not in st.session_state:
-    st.session_state.admin_system = AdminSystem()
-if 'ai_assistant' not in st.session_state:
-    st.session_state.ai_assistant = AIAssistant()
-if 'gamification_system' not in st.session_state:
-    st.session_state.gamification_system = GamificationSystem()
+@st.cache_resource(show_spinner=False)
+def get_shared_systems():
+    """Build the data layer and every subsystem once per process.
+
+    None of them keep per-user state (DataManager's transaction and load
+    snapshots are thread-local), so all sessions share one instance each
+    instead of re-running the file setup for every browser that connects.
+    """
+    data_manager = DataManager()
+    # AuthManager, QuizSystem and VoteSystem look the data layer up in
+    # session_state while they initialize their files
+    st.session_state.data_manager = data_manager
+    notification_system = NotificationSystem()
+    chat_system = ChatSystem()
+    # Deadline and schedule reminders (and compaction) run off the request path, once per server
+    start_reminder_scheduler(data_manager, notification_system, chat_system=chat_system)
+    return {
+        'data_manager': data_manager,
+        'auth_manager': AuthManager(),
+        'ui_components': UIComponents(),
+        'board_system': BoardSystem(),
+        'chat_system': chat_system,
+        'assignment_system': AssignmentSystem(),
+        'quiz_system': QuizSystem(),
+        'attendance_system': AttendanceSystem(),
+        'schedule_system': ScheduleSystem(),
+        'report_generator': ReportGenerator(),
+        'vote_system': VoteSystem(),
+        'notification_system': notification_system,
+        'search_system': SearchSystem(),
+        'video_conference_system': VideoConferenceSystem(),
+        'backup_system': BackupSystem(),
+        'admin_system': AdminSystem(),
+        'ai_assistant': AIAssistant(),
+        'gamification_system': GamificationSystem(),
+    }
+
+for name, system in get_shared_systems().items():
+    if name not in st.session_state:
+        st.session_state[name] = system
 
 # Custom CSS for mobile-first design
 st.markdown("""
@@ -251,7 +255,8 @@ def show_login():
                 if user:
                     st.session_state.user = user
                     st.session_state.notification_system.add_notification(
-                        f"{user['name']}님이 로그인했습니다.", "info", user['username']
+                        f"{user['name']}님이 로그인했습니다.", "info", user['username'],
+                        coalesce_key="login", coalesced_title=f"{user['name']}님이 {{count}}번 로그인했습니다."
                     )
                     st.success(f"환영합니다, {user['name']}님!")
                     st.rerun()
@@ -283,8 +288,7 @@ def show_main_app():
     
     with col2:
         # Notifications indicator
-        notifications = st.session_state.notification_system.get_user_notifications(user['username'])
-        unread_count = len([n for n in notifications if not n.get('read', False)])
+        unread_count = st.session_state.notification_system.get_unread_count(user['username'])
         if unread_count > 0:
             st.markdown(f"🔔 **{unread_count}개 알림**")
     
@@ -295,76 +299,43 @@ def show_main_app():
     
     st.divider()
     
-    # Main navigation tabs with video conference and backup
-    if user['role'] == '선생님':
-        tabs = st.tabs([
-            "🏠 홈", "📝 게시판", "💬 채팅", "📚 과제", "🧠 퀴즈", 
-            "📅 일정", "✅ 출석", "🗳️ 투표", "📹 화상회의", "📊 보고서", 
-            "🔍 검색", "🔔 알림", "💾 백업", "⚙️ 관리자"
-        ])
-    elif user['role'] in ['회장', '부회장']:
-        tabs = st.tabs([
-            "🏠 홈", "📝 게시판", "💬 채팅", "📚 과제", "🧠 퀴즈", 
-            "📅 일정", "✅ 출석", "🗳️ 투표", "📹 화상회의", "📊 보고서", 
-            "🔍 검색", "🔔 알림"
-        ])
-    else:
-        tabs = st.tabs([
-            "🏠 홈", "📝 게시판", "💬 채팅", "📚 과제", "🧠 퀴즈", 
-            "📅 일정", "✅ 출석", "🗳️ 투표", "📹 화상회의", "🔍 검색", "🔔 알림"
-        ])
-    
-    # Tab content
-    with tabs[0]:  # 홈
-        show_home_dashboard(user)
-    
-    with tabs[1]:  # 게시판
-        st.session_state.board_system.show_board_interface(user)
-    
-    with tabs[2]:  # 채팅
-        st.session_state.chat_system.show_chat_interface(user)
-    
-    with tabs[3]:  # 과제
-        st.session_state.assignment_system.show_assignment_interface(user)
-    
-    with tabs[4]:  # 퀴즈
-        st.session_state.quiz_system.show_quiz_interface(user)
-    
-    with tabs[5]:  # 일정
-        st.session_state.schedule_system.show_schedule_interface(user)
-    
-    with tabs[6]:  # 출석
-        st.session_state.attendance_system.show_attendance_interface(user)
-    
-    with tabs[7]:  # 투표
-        st.session_state.vote_system.show_vote_interface(user)
-    
-    with tabs[8]:  # 화상회의
-        st.session_state.video_conference_system.show_conference_interface(user)
-    
-    # Additional tabs for higher roles
+    # Main navigation: only the selected section runs on a rerun, so a click
+    # costs one subsystem's work instead of every tab's
+    sections = get_main_sections(user)
+    labels = list(sections.keys())
+    if st.session_state.get('main_section') not in labels:
+        st.session_state.main_section = labels[0]
+
+    selected = st.radio("메뉴", labels, horizontal=True, key="main_section",
+                        label_visibility="collapsed")
+    sections[selected](user)
+
+def get_main_sections(user):
+    """Navigation label -> render function for the sections the user's role can see"""
+    sections = {
+        "🏠 홈": show_home_dashboard,
+        "📝 게시판": lambda u: st.session_state.board_system.show_board_interface(u),
+        "💬 채팅": lambda u: st.session_state.chat_system.show_chat_interface(u),
+        "📚 과제": lambda u: st.session_state.assignment_system.show_assignment_interface(u),
+        "🧠 퀴즈": lambda u: st.session_state.quiz_system.show_quiz_interface(u),
+        "📅 일정": lambda u: st.session_state.schedule_system.show_schedule_interface(u),
+        "✅ 출석": lambda u: st.session_state.attendance_system.show_attendance_interface(u),
+        "🗳️ 투표": lambda u: st.session_state.vote_system.show_vote_interface(u),
+        "📹 화상회의": lambda u: st.session_state.video_conference_system.show_conference_interface(u),
+    }
+
+    # Additional sections for higher roles
     if user['role'] in ['선생님', '회장', '부회장']:
-        with tabs[9]:  # 보고서
-            st.session_state.report_generator.show_report_interface(user)
-        
-        with tabs[10]:  # 검색
-            st.session_state.search_system.show_search_interface(user)
-        
-        with tabs[11]:  # 알림
-            st.session_state.notification_system.show_notification_interface(user)
-        
-        if user['role'] == '선생님':
-            with tabs[12]:  # 백업
-                st.session_state.backup_system.show_backup_interface(user)
-            
-            with tabs[13]:  # 관리자
-                st.session_state.admin_system.show_admin_interface(user)
-    else:
-        with tabs[8]:  # 검색
-            st.session_state.search_system.show_search_interface(user)
-        
-        with tabs[9]:  # 알림
-            st.session_state.notification_system.show_notification_interface(user)
+        sections["📊 보고서"] = lambda u: st.session_state.report_generator.show_report_interface(u)
+
+    sections["🔍 검색"] = lambda u: st.session_state.search_system.show_search_interface(u)
+    sections["🔔 알림"] = lambda u: st.session_state.notification_system.show_notification_interface(u)
+
+    if user['role'] == '선생님':
+        sections["💾 백업"] = lambda u: st.session_state.backup_system.show_backup_interface(u)
+        sections["⚙️ 관리자"] = lambda u: st.session_state.admin_system.show_admin_interface(u)
+
+    return sections
 
 def show_home_dashboard(user):
     st.markdown("### 📊 대시보드")
@@ -397,8 +368,7 @@ def show_home_dashboard(user):
         """.format(pending_assignments), unsafe_allow_html=True)
     
     with col3:
-        notifications = st.session_state.notification_system.get_user_notifications(user['username'])
-        unread_count = len([n for n in notifications if not n.get('read', False)])
+        unread_count = st.session_state.notification_system.get_unread_count(user['username'])
         
         st.markdown("""
         <div class="metric-card">
@@ -409,8 +379,9 @@ def show_home_dashboard(user):
         """.format(unread_count), unsafe_allow_html=True)
     
     with col4:
-        badges_df = st.session_state.data_manager.load_csv('badges')
-        user_badges = badges_df[badges_df['username'] == user['username']] if not badges_df.empty else pd.DataFrame()
+        user_badges = st.session_state.data_manager.query(
+            'badges', where={'username': user['username']}, columns=['id']
+        )
         
         st.markdown("""
         <div class="metric-card">
@@ -452,7 +423,7 @@ def show_home_dashboard(user):
     
     with col2:
         st.markdown("#### 📢 최근 알림")
-        recent_notifications = notifications[:5] if notifications else []
+        recent_notifications, _ = st.session_state.notification_system.get_notification_page(user['username'], limit=5)
         
         if recent_notifications:
             for notification in recent_notifications:
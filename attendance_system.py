@@ -1,8 +1,7 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime, date, timedelta
-import plotly.express as px
-import plotly.graph_objects as go
+from ui_components import rerun_fragment
 
 
 class AttendanceSystem:
@@ -144,6 +143,13 @@ class AttendanceSystem:
                 "📝 출석 모드", ["일반 출석", "이벤트 출석", "온라인 출석", "야외 활동"],
                 key="attendance_mode_select")
 
+        self.show_attendance_check_grid(user, selected_date, selected_club,
+                                        attendance_mode)
+
+    @st.fragment
+    def show_attendance_check_grid(self, user, selected_date, selected_club,
+                                   attendance_mode):
+        """Per-member check-in form; filtering and saving rerun only this grid"""
         # Get members of selected club
         users_df = st.session_state.data_manager.load_csv('users')
 
@@ -309,34 +315,36 @@ class AttendanceSystem:
             if submit_button:
                 success_count = 0
 
-                for username, data in attendance_data.items():
-                    # Check if record exists
-                    existing_record = day_attendance[day_attendance['username']
-                                                     == username]
-
-                    record_data = {
-                        'username': username,
-                        'club': selected_club,
-                        'date': selected_date.strftime('%Y-%m-%d'),
-                        'status': data['status'],
-                        'note': data['note'],
-                        'recorded_by': user['name'],
-                        'attendance_mode': data['mode'],
-                        'timestamp':
-                        datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    }
-
-                    if not existing_record.empty:
-                        # Update existing record
-                        record_id = existing_record['id'].iloc[0]
-                        if st.session_state.data_manager.update_record(
-                                'attendance', record_id, record_data):
-                            success_count += 1
-                    else:
-                        # Create new record
-                        if st.session_state.data_manager.add_record(
-                                'attendance', record_data):
-                            success_count += 1
+                # The whole sheet is flushed as one attendance write
+                with st.session_state.data_manager.transaction():
+                    for username, data in attendance_data.items():
+                        # Check if record exists
+                        existing_record = day_attendance[
+                            day_attendance['username'] == username]
+
+                        record_data = {
+                            'username': username,
+                            'club': selected_club,
+                            'date': selected_date.strftime('%Y-%m-%d'),
+                            'status': data['status'],
+                            'note': data['note'],
+                            'recorded_by': user['name'],
+                            'attendance_mode': data['mode'],
+                            'timestamp':
+                            datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                        }
+
+                        if not existing_record.empty:
+                            # Update existing record
+                            record_id = existing_record['id'].iloc[0]
+                            if st.session_state.data_manager.update_record(
+                                    'attendance', record_id, record_data):
+                                success_count += 1
+                        else:
+                            # Create new record
+                            if st.session_state.data_manager.add_record(
+                                    'attendance', record_data):
+                                success_count += 1
 
                 if success_count == len(attendance_data):
                     st.success(f"출석이 성공적으로 저장되었습니다! ({success_count}명)")
@@ -354,7 +362,7 @@ class AttendanceSystem:
                     # 출석 포인트 부여
                     self.award_attendance_points(attendance_data)
 
-                    st.rerun()
+                    rerun_fragment()
                 else:
                     st.warning(
                         f"일부 출석 저장에 실패했습니다. ({success_count}/{len(attendance_data)})"
@@ -368,9 +376,8 @@ class AttendanceSystem:
         """Display enhanced user's own attendance"""
         st.markdown("#### 📋 내 출석 현황 대시보드")
 
-        attendance_df = st.session_state.data_manager.load_csv('attendance')
-        user_attendance = attendance_df[attendance_df['username'] ==
-                                        user['username']]
+        user_attendance = st.session_state.data_manager.query(
+            'attendance', where={'username': user['username']})
 
         if user_attendance.empty:
             st.info("출석 기록이 없습니다.")
@@ -724,7 +731,8 @@ class AttendanceSystem:
             ['date', 'status']).size().unstack(fill_value=0)
 
         if not daily_attendance.empty:
-            # Plotly 차트로 개선
+            # Plotly 차트로 개선 (plotly is only imported once a chart is drawn)
+            import plotly.express as px
             fig = px.bar(daily_attendance.reset_index(),
                          x='date',
                          y=daily_attendance.columns.tolist(),
@@ -749,19 +757,31 @@ class AttendanceSystem:
         """Display comprehensive attendance statistics for managers"""
         st.markdown("#### 📈 종합 출석 통계 분석")
 
-        attendance_df = st.session_state.data_manager.load_csv('attendance')
-
-        if attendance_df.empty:
-            st.info("통계를 생성할 출석 데이터가 없습니다.")
-            return
+        period_days = {"전체": None, "최근 1개월": 30, "최근 3개월": 90, "최근 1년": 365}
+        period = st.selectbox("📅 분석 기간", list(period_days.keys()),
+                              key="stats_analysis_period")
 
         # Filter by user's manageable clubs
+        where = {}
         if user['role'] != '선생님':
             user_clubs = st.session_state.data_manager.get_user_clubs(
                 user['username'])
-            club_names = user_clubs['club_name'].tolist()
-            attendance_df = attendance_df[attendance_df['club'].isin(
-                club_names)]
+            where['club'] = user_clubs['club_name'].tolist()
+
+        # Only the columns and date range the analyses use are read
+        between = None
+        if period_days[period]:
+            since = date.today() - timedelta(days=period_days[period])
+            between = {'date': (since.strftime('%Y-%m-%d'), None)}
+        attendance_df = st.session_state.data_manager.query(
+            'attendance',
+            where=where,
+            columns=['username', 'club', 'date', 'status'],
+            between=between)
+
+        if attendance_df.empty:
+            st.info("통계를 생성할 출석 데이터가 없습니다.")
+            return
 
         # 통계 분석 옵션
         analysis_type = st.selectbox(
@@ -1262,18 +1282,19 @@ class AttendanceSystem:
         # 해당 일정 참가자들 자동 출석 처리
         users_df = st.session_state.data_manager.load_csv('users')
 
-        for _, member in users_df.iterrows():
-            attendance_data = {
-                'username': member['username'],
-                'club': schedule.get('club', '전체'),
-                'date': schedule['date'],
-                'status': '출석',
-                'note': f"일정 '{schedule['title']}' 참석",
-                'recorded_by': user['name'],
-                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
-            st.session_state.data_manager.add_record('attendance',
-                                                     attendance_data)
+        with st.session_state.data_manager.transaction():
+            for _, member in users_df.iterrows():
+                attendance_data = {
+                    'username': member['username'],
+                    'club': schedule.get('club', '전체'),
+                    'date': schedule['date'],
+                    'status': '출석',
+                    'note': f"일정 '{schedule['title']}' 참석",
+                    'recorded_by': user['name'],
+                    'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                }
+                st.session_state.data_manager.add_record('attendance',
+                                                         attendance_data)
 
     def show_current_rewards_status(self):
         """현재 리워드 현황 표시"""
@@ -1514,8 +1535,8 @@ class AttendanceSystem:
     # 헬퍼 메서드들 (기존 메서드들을 개선하고 새로운 메서드들 추가)
     def get_recent_attendance_pattern(self, username):
         """최근 출석 패턴 조회"""
-        attendance_df = st.session_state.data_manager.load_csv('attendance')
-        user_attendance = attendance_df[attendance_df['username'] == username]
+        user_attendance = st.session_state.data_manager.query(
+            'attendance', where={'username': username}, columns=['status'])
 
         if len(user_attendance) < 5:
             return ""
@@ -1535,14 +1556,14 @@ class AttendanceSystem:
 
     def get_attendance_streak(self, username):
         """연속 출석일 계산"""
-        attendance_df = st.session_state.data_manager.load_csv('attendance')
-        user_attendance = attendance_df[attendance_df['username'] == username]
+        user_attendance = st.session_state.data_manager.query(
+            'attendance', where={'username': username},
+            columns=['date', 'status'], order_by='date', ascending=False)
 
         if user_attendance.empty:
             return 0
 
         # 최근 기록부터 연속 출석 계산
-        user_attendance = user_attendance.sort_values('date', ascending=False)
         streak = 0
 
         for _, record in user_attendance.iterrows():
@@ -1560,6 +1581,7 @@ class AttendanceSystem:
             status_counts = attendance_data['status'].value_counts()
 
             # 파이 차트
+            import plotly.express as px
             fig = px.pie(values=status_counts.values,
                          names=status_counts.index,
                          title="최근 30일 출석 패턴",
@@ -1724,6 +1746,8 @@ class AttendanceSystem:
 
     def show_attendance_gauge(self, rate):
         """출석률 게이지 차트"""
+        import plotly.graph_objects as go
+
         fig = go.Figure(
             go.Indicator(mode="gauge+number",
                          value=rate,
@@ -1901,8 +1925,8 @@ class AttendanceSystem:
     def get_user_points(self, username):
         """현재 포인트"""
         # 실제 구현에서는 데이터베이스에서 조회
-        attendance_df = st.session_state.data_manager.load_csv('attendance')
-        user_records = attendance_df[attendance_df['username'] == username]
+        user_records = st.session_state.data_manager.query(
+            'attendance', where={'username': username}, columns=['status'])
 
         points = 0
         for _, record in user_records.iterrows():
@@ -1916,8 +1940,8 @@ class AttendanceSystem:
     def get_points_change(self, username):
         """포인트 변화량"""
         # 최근 7일 변화량 계산
-        attendance_df = st.session_state.data_manager.load_csv('attendance')
-        user_records = attendance_df[attendance_df['username'] == username]
+        user_records = st.session_state.data_manager.query(
+            'attendance', where={'username': username}, columns=['status'])
 
         if user_records.empty:
             return 0
@@ -1934,8 +1958,8 @@ class AttendanceSystem:
 
     def get_available_badges(self, username):
         """획득 가능한 뱃지"""
-        attendance_df = st.session_state.data_manager.load_csv('attendance')
-        user_records = attendance_df[attendance_df['username'] == username]
+        user_records = st.session_state.data_manager.query(
+            'attendance', where={'username': username})
 
         badges = []
 
@@ -1979,10 +2003,8 @@ class AttendanceSystem:
     def get_reward_history(self, username):
         """리워드 히스토리"""
         # 실제 구현에서는 리워드 데이터베이스에서 조회
-        badges_df = st.session_state.data_manager.load_csv('badges')
-        user_badges = badges_df[
-            badges_df['username'] ==
-            username] if not badges_df.empty else pd.DataFrame()
+        user_badges = st.session_state.data_manager.query(
+            'badges', where={'username': username})
 
         history = []
         for _, badge in user_badges.iterrows():
@@ -2028,10 +2050,9 @@ class AttendanceSystem:
 
     def get_user_qr_history(self, username):
         """사용자 QR 히스토리"""
-        attendance_df = st.session_state.data_manager.load_csv('attendance')
-        qr_records = attendance_df[(attendance_df['username'] == username) & (
-            attendance_df['note'] == 'QR 체크인'
-        )] if not attendance_df.empty else pd.DataFrame()
+        qr_records = st.session_state.data_manager.query(
+            'attendance', where={'username': username, 'note': 'QR 체크인'},
+            columns=['date', 'club', 'status'])
 
         history = []
         for _, record in qr_records.iterrows():
@@ -5,6 +5,7 @@ import os
 import io
 from datetime import datetime
 import json
+from chat_system import SEGMENT_PREFIX, segment_tables
 
 class BackupSystem:
     def __init__(self):
@@ -90,7 +91,7 @@ class BackupSystem:
             
             restore_options = st.multiselect(
                 "복원할 데이터 선택",
-                ["사용자 계정", "게시판", "과제", "퀴즈", "채팅", "일정", "투표", "출석"],
+                ["사용자 계정", "게시판", "과제", "퀴즈", "채팅", "일정", "투표", "출석", "알림"],
                 default=["사용자 계정", "게시판", "과제"]
             )
             
@@ -110,27 +111,21 @@ class BackupSystem:
         """Display backup management interface"""
         st.markdown("#### 📊 백업 관리")
         
-        # CSV files overview
-        data_dir = "data"
-        if os.path.exists(data_dir):
-            csv_files = [f for f in os.listdir(data_dir) if f.endswith('.csv')]
-            
+        # Tables overview, read through the storage engine (the CSV files are stale on SQLite)
+        data_manager = st.session_state.data_manager
+        csv_files = [f"{table}.csv" for table in data_manager.storage.list_tables()]
+        if csv_files:
             st.markdown("##### 📁 현재 데이터 파일")
             
             file_data = []
             for csv_file in csv_files:
-                file_path = os.path.join(data_dir, csv_file)
-                file_size = os.path.getsize(file_path)
-                file_modified = datetime.fromtimestamp(os.path.getmtime(file_path))
-                
-                df = pd.read_csv(file_path)
-                record_count = len(df)
+                file_size = data_manager.table_size(csv_file)
+                record_count = len(data_manager.load_csv(csv_file))
                 
                 file_data.append({
                     'File': csv_file,
                     'Records': record_count,
-                    'Size (KB)': f"{file_size/1024:.1f}",
-                    'Modified': file_modified.strftime('%Y-%m-%d %H:%M')
+                    'Size (KB)': "-" if file_size is None else f"{file_size/1024:.1f}"
                 })
             
             files_df = pd.DataFrame(file_data)
@@ -176,15 +171,9 @@ class BackupSystem:
                 
                 zipf.writestr('backup_metadata.json', json.dumps(metadata, indent=2))
                 
-                # Add CSV files based on backup type
-                data_dir = "data"
-                if os.path.exists(data_dir):
-                    files_to_backup = self.get_files_for_backup_type(backup_type)
-                    
-                    for filename in files_to_backup:
-                        file_path = os.path.join(data_dir, filename)
-                        if os.path.exists(file_path):
-                            zipf.write(file_path, filename)
+                # Add every table of the backup type, read through the storage engine
+                for filename in self.get_files_for_backup_type(backup_type):
+                    st.session_state.data_manager.export_table(zipf, filename)
                 
                 # Add uploads directory if exists and images are included
                 if include_images and os.path.exists("uploads"):
@@ -228,27 +217,40 @@ class BackupSystem:
                 "채팅": "chat_logs.csv",
                 "일정": "schedule.csv",
                 "투표": "votes.csv",
-                "출석": "attendance.csv"
+                "출석": "attendance.csv",
+                # Broadcasts without their read receipts would be unread again for everyone
+                "알림": ["notifications.csv", "notification_reads.csv", "notification_merges.csv"]
             }
             
+            files_to_restore = []
             for option in restore_options:
                 if option in file_mapping:
                     files = file_mapping[option]
                     if isinstance(files, str):
                         files = [files]
                     
-                    for filename in files:
-                        temp_file_path = os.path.join(temp_dir, filename)
-                        target_file_path = os.path.join("data", filename)
-                        
-                        if os.path.exists(temp_file_path):
-                            # Backup existing file
-                            if os.path.exists(target_file_path):
-                                backup_existing_path = f"{target_file_path}.backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                                os.rename(target_file_path, backup_existing_path)
-                            
-                            # Copy restored file
-                            os.rename(temp_file_path, target_file_path)
+                    if option == "채팅":
+                        # Per-room segments next to the (legacy) shared log
+                        files = files + self.get_chat_segment_files(temp_dir)
+                    
+                    files_to_restore += [f for f in files if os.path.exists(os.path.join(temp_dir, f))]
+            
+            if files_to_restore:
+                data_manager = st.session_state.data_manager
+                # Keep a copy of the tables being replaced
+                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                with zipfile.ZipFile(os.path.join("data", f"pre_restore_{timestamp}.zip"), 'w', zipfile.ZIP_DEFLATED) as zipf:
+                    for filename in files_to_restore:
+                        data_manager.export_table(zipf, filename)
+                
+                # Written through the storage engine, so every backend sees the restored rows
+                for filename in files_to_restore:
+                    if not data_manager.import_table(filename, os.path.join(temp_dir, filename)):
+                        return False
+            
+            if "채팅" in restore_options:
+                # Partition a restored chat_logs.csv and drop buffers holding the replaced messages
+                st.session_state.chat_system.reload()
             
             # Cleanup
             import shutil
@@ -266,22 +268,26 @@ class BackupSystem:
         
         with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zipf:
             for filename in selected_files:
-                file_path = os.path.join("data", filename)
-                if os.path.exists(file_path):
-                    zipf.write(file_path, filename)
+                st.session_state.data_manager.export_table(zipf, filename)
         
         zip_buffer.seek(0)
         return zip_buffer
     
+    def get_chat_segment_files(self, directory="data"):
+        """The chat_logs__<room>.csv files (one per chat room) in an extracted backup"""
+        if not os.path.isdir(directory):
+            return []
+        return sorted(f for f in os.listdir(directory) if f.startswith(SEGMENT_PREFIX) and f.endswith(".csv"))
+    
     def get_files_for_backup_type(self, backup_type):
         """Get list of files to backup based on type"""
         all_files = [
             "users.csv", "clubs.csv", "user_clubs.csv", "posts.csv", "comments.csv",
             "assignments.csv", "submissions.csv", "quizzes.csv", "quiz_responses.csv",
             "chat_logs.csv", "schedule.csv", "votes.csv", "vote_options.csv",
-            "vote_responses.csv", "attendance.csv", "notifications.csv", "badges.csv",
-            "points.csv", "video_conferences.csv"
-        ]
+            "vote_responses.csv", "attendance.csv", "notifications.csv", "notification_reads.csv",
+            "notification_merges.csv", "badges.csv", "points.csv", "video_conferences.csv"
+        ] + [f"{table}.csv" for table in segment_tables(st.session_state.data_manager)]
         
         if backup_type == "전체 백업":
             return all_files
@@ -2,9 +2,12 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 import base64
-from PIL import Image
 import io
 import os
+from ui_components import rerun_fragment
+
+# Post cards rendered at first; "더 보기" adds another page of cards
+POSTS_PAGE_SIZE = 10
 
 class BoardSystem:
     def __init__(self):
@@ -23,8 +26,9 @@ class BoardSystem:
         with tab2:
             self.show_post_creation(user)
 
+    @st.fragment
     def show_posts_list(self, user):
-        """Display list of posts"""
+        """Display list of posts; reruns on its own when used"""
         st.markdown("#### 📋 게시글 목록")
 
         # Filter options
@@ -78,10 +82,22 @@ class BoardSystem:
             posts_df['created_date'] = pd.to_datetime(posts_df['created_date'])
             posts_df = posts_df.sort_values('created_date', ascending=False)
 
-        # Display posts
-        for _, post in posts_df.iterrows():
+        # Cards shown so far; changing a filter starts over at one page
+        filters = (selected_club, sort_by, search_term)
+        feed = st.session_state.get('board_feed')
+        if not feed or feed['filters'] != filters:
+            feed = {'filters': filters, 'shown': POSTS_PAGE_SIZE}
+            st.session_state.board_feed = feed
+
+        # Display posts; only the visible slice gets cards and buttons
+        for _, post in posts_df.head(feed['shown']).iterrows():
             self.show_post_card(post, user)
 
+        if len(posts_df) > feed['shown']:
+            if st.button(f"⬇️ 더 보기 ({feed['shown']}/{len(posts_df)})", use_container_width=True):
+                feed['shown'] += POSTS_PAGE_SIZE
+                rerun_fragment()
+
     def show_post_card(self, post, user):
         """Display a single post card"""
         # Calculate engagement metrics
@@ -137,7 +153,7 @@ class BoardSystem:
             with col1:
                 if st.button("👍 좋아요", key=f"like_{post['id']}"):
                     self.like_post(post['id'])
-                    st.rerun()
+                    rerun_fragment()
 
             with col2:
                 if st.button("💬 댓글", key=f"comment_{post['id']}"):
@@ -153,7 +169,7 @@ class BoardSystem:
                     if st.button("🗑️ 삭제", key=f"delete_{post['id']}"):
                         if self.delete_post(post['id']):
                             st.success("게시글이 삭제되었습니다.")
-                            st.rerun()
+                            rerun_fragment()
 
             # Show comments if requested
             if st.session_state.get(f'show_comments_{post["id"]}', False):
@@ -233,6 +249,8 @@ class BoardSystem:
 
     def process_uploaded_image(self, uploaded_file):
         """Process uploaded image and return base64 encoded string"""
+        from PIL import Image
+
         try:
             image = Image.open(uploaded_file)
 
@@ -288,7 +306,7 @@ class BoardSystem:
         # Close comments
         if st.button("❌ 댓글 닫기", key=f"close_comments_{post_id}"):
             st.session_state[f'show_comments_{post_id}'] = False
-            st.rerun()
+            rerun_fragment()
 
     def show_edit_post_form(self, post, user):
         """Display post edit form"""
@@ -316,10 +334,10 @@ class BoardSystem:
                 if st.session_state.data_manager.update_record('posts', post['id'], updates):
                     st.success("게시글이 수정되었습니다!")
                     st.session_state[f'edit_post_{post["id"]}'] = False
-                    st.rerun()
+                    rerun_fragment()
                 else:
                     st.error("게시글 수정에 실패했습니다.")
 
             if cancel_button:
                 st.session_state[f'edit_post_{post["id"]}'] = False
-                st.rerun()
\ No newline at end of file
+                rerun_fragment()
\ No newline at end of file
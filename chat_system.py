@@ -1,10 +1,276 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+
 import streamlit as st
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
+from data_manager import TABLE_SCHEMAS
+from storage_backends import PARTITION_SEPARATOR, file_lock
+from ui_components import rerun_fragment
+
+# Messages per chat page; "이전 메시지" loads one more page further back
+CHAT_PAGE_SIZE = 50
+
+# Each room's messages are an append-only table of their own, so reading or
+# writing one room never touches another room's history. Ids still come
+# from the chat_logs sequence and are unique (and time-ordered) across rooms.
+CHAT_TABLE = 'chat_logs'
+SEGMENT_PREFIX = CHAT_TABLE + PARTITION_SEPARATOR
+
+# Newest messages per room kept in memory by the shared ChatSystem. Pages
+# and polls inside that window never touch the store.
+CHAT_BUFFER_SIZE = 200
+# Seconds a room buffer is trusted before it is re-read from the store,
+# which picks up messages written by other server processes
+CHAT_BUFFER_REFRESH = 30
+# Seconds between polls of an open chat room for new messages; 0 turns live updates off
+CHAT_POLL_INTERVAL = float(os.environ.get('CLUBSYSTEM_CHAT_POLL_INTERVAL', '3'))
+
+# Deleted messages stay in their segment as tombstones (deleted=True) for
+# this many days, then compact_messages() moves them to gzip CSV archives,
+# one per month of the message timestamp
+CHAT_TOMBSTONE_GRACE_DAYS = 7
+CHAT_ARCHIVE_DIR = 'archive'
+# Tombstones left per segment; a segment recorded with 0 is read without the
+# deleted filter, an unrecorded one always gets it
+TOMBSTONES_FILE = '.chat_tombstones.json'
+
+
+def room_segment(room):
+    """Table holding one room's messages, e.g. chat_logs__코딩"""
+    slug = re.sub(r'\W', '_', room)
+    if slug != room:
+        # Keep rooms that only differ in punctuation apart
+        slug += '_' + hashlib.sha1(room.encode('utf-8')).hexdigest()[:8]
+    return SEGMENT_PREFIX + slug
+
+
+def segment_tables(data_manager):
+    """Every room segment table the storage engine holds"""
+    return [table for table in data_manager.storage.list_tables() if table.startswith(SEGMENT_PREFIX)]
+
 
 class ChatSystem:
     def __init__(self):
         self.chat_file = 'data/chat_logs.csv'
+        self._partitioned = False
+        self._partition_lock = threading.Lock()
+        self._id_floor = 1
+        # segment -> {'rows': deque of message dicts in id order, 'complete': bool, 'loaded': monotonic time}
+        self._buffers = {}
+        self._segment_list = None
+        self._buffer_lock = threading.Lock()
+        self._tombstone_cache = None
+    
+    def _ensure_partitioned(self):
+        """Once per process, move rows left in the unpartitioned chat_logs table into room segments"""
+        if self._partitioned:
+            return
+        with self._partition_lock:
+            if not self._partitioned:
+                self.partition_legacy_log()
+                # Ids below this are taken even if the chat_logs sequence file was lost
+                last_ids = [
+                    int(tail['id'].iloc[-1]) for tail in
+                    (st.session_state.data_manager.tail(segment, 1) for segment in self._segments())
+                    if not tail.empty
+                ]
+                self._id_floor = max(last_ids, default=0) + 1
+                self._partitioned = True
+    
+    def partition_legacy_log(self):
+        """Split the rows of the shared chat_logs table (old data, restored backups) into room segments"""
+        data_manager = st.session_state.data_manager
+        with data_manager.storage.locked(CHAT_TABLE):
+            legacy = data_manager.load_csv(CHAT_TABLE)
+            if legacy.empty:
+                return
+            
+            for room, rows in legacy.groupby('club', sort=False):
+                segment = room_segment(room)
+                existing = data_manager.load_csv(segment)
+                if not existing.empty:
+                    rows = rows[~rows['id'].isin(existing['id'])]
+                if rows.empty:
+                    continue
+                if (rows['deleted'] == True).any():
+                    self._record_tombstones(data_manager.data_dir, segment, None)
+                if not existing.empty and rows['id'].min() < existing['id'].max():
+                    # Keep the segment in id order so tail reads stay correct
+                    merged = pd.concat([existing, rows], ignore_index=True).sort_values('id', kind='stable')
+                    data_manager.save_csv(segment, merged)
+                else:
+                    data_manager.add_records(segment, rows.sort_values('id', kind='stable').to_dict('records'))
+            
+            data_manager.save_csv(CHAT_TABLE, legacy.iloc[0:0])
+    
+    def _segments(self, rooms=None):
+        """Segment tables of the given rooms (every existing segment when rooms is None)"""
+        if rooms is not None:
+            return [room_segment(room) for room in rooms]
+        with self._buffer_lock:
+            if self._segment_list is None or time.monotonic() - self._segment_list[0] > CHAT_BUFFER_REFRESH:
+                tables = st.session_state.data_manager.storage.list_tables()
+                self._segment_list = (time.monotonic(), {t for t in tables if t.startswith(SEGMENT_PREFIX)})
+            return sorted(self._segment_list[1])
+    
+    def _buffered(self, segment):
+        """In-memory tail of a segment: its newest CHAT_BUFFER_SIZE rows (deleted ones included).
+        
+        Loaded from the store on first use and again once older than
+        CHAT_BUFFER_REFRESH; this process's own sends and deletes update it
+        in place. 'complete' means the buffer holds the whole segment.
+        """
+        with self._buffer_lock:
+            buffer = self._buffers.get(segment)
+            if buffer is not None and time.monotonic() - buffer['loaded'] <= CHAT_BUFFER_REFRESH:
+                return buffer
+        
+        rows = st.session_state.data_manager.tail(segment, CHAT_BUFFER_SIZE)
+        buffer = {
+            'rows': deque(rows.to_dict('records'), maxlen=CHAT_BUFFER_SIZE),
+            'complete': len(rows) < CHAT_BUFFER_SIZE,
+            'loaded': time.monotonic(),
+        }
+        with self._buffer_lock:
+            self._buffers[segment] = buffer
+        return buffer
+    
+    def _remember(self, segment, message):
+        """Put a message just written to a segment into its buffer, if that buffer is loaded"""
+        with self._buffer_lock:
+            if self._segment_list is not None:
+                self._segment_list[1].add(segment)
+            buffer = self._buffers.get(segment)
+            if buffer is None:
+                return
+            rows = buffer['rows']
+            if any(row['id'] == message['id'] for row in rows):
+                # A reload already read it back from the store
+                return
+            # Concurrent sends can finish out of id order
+            position = len(rows)
+            while position and rows[position - 1]['id'] > message['id']:
+                position -= 1
+            if len(rows) == rows.maxlen:
+                if position == 0:
+                    # Older than everything buffered; the store still has it
+                    return
+                rows.popleft()
+                position -= 1
+                buffer['complete'] = False
+            rows.insert(position, dict(message))
+    
+    def _segment_tail(self, segment, limit, before_id=None):
+        """The limit newest rows of a segment older than before_id, from its buffer when that covers them"""
+        buffer = self._buffered(segment)
+        with self._buffer_lock:
+            rows = [row for row in buffer['rows'] if before_id is None or row['id'] < before_id]
+            if len(rows) >= limit or buffer['complete']:
+                return pd.DataFrame(rows[-limit:])
+        return st.session_state.data_manager.tail(segment, limit, before_id=before_id)
+    
+    def get_new_messages(self, room, after_id, cross_room=False):
+        """Live messages of a room (or of every room) with id > after_id, oldest first.
+        
+        Served from the in-memory buffers only, so it is cheap enough to
+        poll; messages beyond the buffered window are left to a page read.
+        """
+        self._ensure_partitioned()
+        segments = self._segments() if cross_room else [room_segment(room)]
+        messages = []
+        for segment in segments:
+            buffer = self._buffered(segment)
+            with self._buffer_lock:
+                messages.extend(
+                    dict(row) for row in buffer['rows']
+                    if row['id'] > after_id and row.get('deleted') is not True
+                )
+        return sorted(messages, key=lambda message: message['id'])
+    
+    def load_messages(self, rooms=None, include_deleted=False):
+        """Messages of the given rooms (all rooms when None), in id order"""
+        self._ensure_partitioned()
+        data_manager = st.session_state.data_manager
+        tombstones = self._tombstone_counts(data_manager.data_dir)
+        frames = []
+        for segment in self._segments(rooms):
+            df = data_manager.load_csv(segment)
+            if not df.empty and not include_deleted and tombstones.get(segment) != 0:
+                df = df[df['deleted'] != True]
+            if not df.empty:
+                frames.append(df)
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True).sort_values('id', kind='stable') if len(frames) > 1 else frames[0]
+    
+    def _tombstone_counts(self, data_dir):
+        """{segment: tombstones left}, re-read only when the file changed"""
+        path = os.path.join(data_dir, TOMBSTONES_FILE)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        cached = self._tombstone_cache
+        if cached is None or cached[0] != (path, mtime):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    counts = json.load(f)
+            except (FileNotFoundError, ValueError):
+                counts = {}
+            cached = self._tombstone_cache = ((path, mtime), counts)
+        return cached[1]
+    
+    def _record_tombstones(self, data_dir, segment, count, added=0):
+        """Set a segment's tombstone count (None forgets it), or raise a recorded one by added"""
+        path = os.path.join(data_dir, TOMBSTONES_FILE)
+        with file_lock(path + '.lock'):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    counts = json.load(f)
+            except (FileNotFoundError, ValueError):
+                counts = {}
+            
+            if added:
+                if segment not in counts:
+                    # Unrecorded segments are filtered anyway
+                    return
+                count = counts[segment] + added
+            if count is None:
+                if counts.pop(segment, None) is None:
+                    return
+            else:
+                counts[segment] = count
+            
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(counts, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+    
+    def reload(self):
+        """Pick up chat data replaced on disk by a restore: split a restored chat_logs
+        table into segments and drop the buffered rooms and tombstone counts"""
+        self.forget_tombstones(st.session_state.data_manager.data_dir)
+        self._tombstone_cache = None
+        with self._buffer_lock:
+            self._buffers.clear()
+            self._segment_list = None
+        with self._partition_lock:
+            self._partitioned = False
+        self._ensure_partitioned()
+    
+    def forget_tombstones(self, data_dir='data'):
+        """Drop every tombstone count, e.g. after segment files were replaced by a restore"""
+        path = os.path.join(data_dir, TOMBSTONES_FILE)
+        with file_lock(path + '.lock'):
+            if os.path.exists(path):
+                os.remove(path)
     
     def show_chat_interface(self, user):
         """Display the chat interface"""
@@ -19,51 +285,148 @@ class ChatSystem:
             all_clubs = clubs_df['name'].tolist() if not clubs_df.empty else []
             club_options = ["전체"] + all_clubs
         
+        self.show_chat_room(club_options, user)
+    
+    @st.fragment
+    def show_chat_room(self, club_options, user):
+        """Room picker, messages and input; reruns on its own when used"""
         # Chat room selection
         selected_room = st.selectbox("💬 채팅방 선택", club_options)
         
-        # Display chat messages
-        self.show_chat_messages(selected_room, user)
+        # Display chat messages; a teacher's "전체" shows every room
+        cross_room = selected_room == "전체" and user['role'] == '선생님'
+        self.show_chat_messages(selected_room, user, cross_room)
         
         # Message input
         self.show_message_input(selected_room, user)
     
-    def show_chat_messages(self, room, user):
+    def _tail(self, room, limit, before_id, cross_room):
+        """The limit newest messages (deleted ones included) of a room, or of every room, older than before_id"""
+        if not cross_room:
+            return self._segment_tail(room_segment(room), limit, before_id)
+        # Newest limit of all rooms = newest limit of the union of each room's newest limit
+        frames = [self._segment_tail(segment, limit, before_id) for segment in self._segments()]
+        frames = [df for df in frames if not df.empty]
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True).sort_values('id', kind='stable').tail(limit)
+    
+    def get_messages_page(self, room, limit=CHAT_PAGE_SIZE, before_id=None, cross_room=False):
+        """Up to limit live messages of a room older than before_id, oldest first.
+        
+        Returns (messages, cursor); pass cursor as before_id to get the page
+        before this one. cursor is None once the room's history is exhausted.
+        Only the tail of the room's segment is read, never the whole history,
+        and recent pages come from the in-memory room buffer; cross_room
+        merges the tails of every room instead.
+        """
+        self._ensure_partitioned()
+        # A compacted segment without tombstones needs no deleted filter
+        tombstones = self._tombstone_counts(st.session_state.data_manager.data_dir)
+        clean = not cross_room and tombstones.get(room_segment(room)) == 0
+        pages = []
+        found = 0
+        cursor = before_id
+        while found < limit:
+            rows = self._tail(room, limit, cursor, cross_room)
+            if rows.empty:
+                cursor = None
+                break
+            live = rows if clean else rows[rows['deleted'] != True]
+            pages.insert(0, live)
+            found += len(live)
+            cursor = int(rows['id'].iloc[0])
+            if len(rows) < limit:
+                cursor = None
+                break
+        
+        if not pages:
+            return pd.DataFrame(), None
+        messages = pd.concat(pages, ignore_index=True) if len(pages) > 1 else pages[0]
+        if len(messages) > limit:
+            messages = messages.tail(limit)
+            cursor = int(messages['id'].iloc[0])
+        return messages, cursor
+    
+    def show_chat_messages(self, room, user, cross_room=False):
         """Display chat messages for the selected room"""
-        chat_df = st.session_state.data_manager.load_csv('chat_logs')
+        # Pages loaded per room; older pages are fetched by the id cursor of the page after them
+        loaded_pages = st.session_state.setdefault('chat_loaded_pages', {})
+        pages = []
+        cursor = None
+        for _ in range(loaded_pages.get(room, 1)):
+            messages, cursor = self.get_messages_page(room, before_id=cursor, cross_room=cross_room)
+            if not messages.empty:
+                pages.insert(0, messages)
+            if cursor is None:
+                break
         
-        if chat_df.empty:
-            st.info("아직 메시지가 없습니다.")
-            return
+        # Messages newer than the last one shown here are polled live below
+        last_id = int(pages[-1]['id'].iloc[-1]) if pages else 0
         
-        # Filter messages for the selected room
-        if room != "전체":
-            room_messages = chat_df[
-                (chat_df['club'] == room) & 
-                (chat_df['deleted'] != True)
-            ]
+        if not pages:
+            st.info("이 채팅방에는 아직 메시지가 없습니다.")
         else:
-            room_messages = chat_df[chat_df['deleted'] != True]
+            # Create a container for messages with fixed height
+            messages_container = st.container()
+            
+            with messages_container:
+                st.markdown("#### 💬 메시지")
+                
+                if cursor is not None:
+                    if st.button("⬆️ 이전 메시지 더 보기", key=f"older_msgs_{room}", use_container_width=True):
+                        loaded_pages[room] = loaded_pages.get(room, 1) + 1
+                        rerun_fragment()
+                
+                # Display messages, one element per page
+                for messages in pages:
+                    self.display_messages(messages, user)
         
-        if room_messages.empty:
-            st.info("이 채팅방에는 아직 메시지가 없습니다.")
-            return
+        self.show_live_messages(room, user, last_id, cross_room)
         
-        # Sort by timestamp
-        room_messages = room_messages.sort_values('timestamp')
+        if user['role'] == '선생님' and pages:
+            self.show_moderation_controls(pages)
+    
+    @st.fragment(run_every=CHAT_POLL_INTERVAL or None)
+    def show_live_messages(self, room, user, after_id, cross_room=False):
+        """Messages that arrived after after_id, re-polled from the room buffer every CHAT_POLL_INTERVAL seconds"""
+        messages = self.get_new_messages(room, after_id, cross_room)
+        if len(messages) >= CHAT_PAGE_SIZE:
+            # Fold a full page of new messages into the paged view above
+            st.rerun()
+        self.display_messages(messages, user)
+    
+    def show_moderation_controls(self, pages):
+        """One delete/copy control for the messages on screen, created only when a teacher opens it"""
+        if not st.toggle("🛠️ 메시지 관리", key="chat_moderation"):
+            return
         
-        # Create a container for messages with fixed height
-        messages_container = st.container()
+        messages = {
+            int(message['id']): message
+            for page in pages for message in page.to_dict('records')
+        }
+        if not messages:
+            return
         
-        with messages_container:
-            st.markdown("#### 💬 메시지")
-            
-            # Display messages
-            for _, message in room_messages.iterrows():
-                self.display_message(message, user)
+        col1, col2, col3 = st.columns([6, 1, 1])
+        with col1:
+            message_id = st.selectbox(
+                "관리할 메시지",
+                list(reversed(messages)),
+                format_func=lambda i: f"{messages[i]['username']}: {str(messages[i]['message'])[:40]}",
+                label_visibility="collapsed"
+            )
+        message = messages[message_id]
+        with col2:
+            if st.button("🗑️", key="delete_msg", help="메시지 삭제"):
+                self.delete_message(message_id, message['club'])
+                rerun_fragment()
+        with col3:
+            if st.button("📋", key="copy_msg", help="메시지 복사"):
+                st.write(f"복사됨: {message['message']}")
     
-    def display_message(self, message, current_user):
-        """Display a single chat message"""
+    def message_html(self, message, current_user):
+        """HTML of a single chat message bubble"""
         is_own_message = message['username'] == current_user['username']
         
         # Time formatting
@@ -73,7 +436,7 @@ class ChatSystem:
         
         if is_own_message:
             # Own message (right aligned)
-            st.markdown(f"""
+            return f"""
             <div style="text-align: right; margin: 10px 0;">
                 <div class="chat-message-own">
                     <div style="font-weight: bold; font-size: 12px; margin-bottom: 5px; opacity: 0.8;">{message['username']}</div>
@@ -81,10 +444,9 @@ class ChatSystem:
                     <div style="font-size: 10px; margin-top: 5px; opacity: 0.7;">{date_str} {time_str}</div>
                 </div>
             </div>
-            """, unsafe_allow_html=True)
-        else:
-            # Other's message (left aligned)
-            st.markdown(f"""
+            """
+        # Other's message (left aligned)
+        return f"""
             <div style="text-align: left; margin: 10px 0;">
                 <div class="chat-message-other">
                     <div style="font-weight: bold; font-size: 12px; margin-bottom: 5px; color: #FF6B6B;">{message['username']}</div>
@@ -92,18 +454,21 @@ class ChatSystem:
                     <div style="font-size: 10px; margin-top: 5px; color: #666;">{date_str} {time_str}</div>
                 </div>
             </div>
-            """, unsafe_allow_html=True)
-        
-        # Admin controls
-        if current_user['role'] == '선생님':
-            col1, col2, col3 = st.columns([1, 1, 8])
-            with col1:
-                if st.button("🗑️", key=f"delete_msg_{message['id']}", help="메시지 삭제"):
-                    self.delete_message(message['id'])
-                    st.rerun()
-            with col2:
-                if st.button("📋", key=f"copy_msg_{message['id']}", help="메시지 복사"):
-                    st.write(f"복사됨: {message['message']}")
+            """
+    
+    def display_messages(self, messages, current_user):
+        """Render a batch of messages (dicts or DataFrame rows) as a single markdown element"""
+        if isinstance(messages, pd.DataFrame):
+            messages = messages.to_dict('records')
+        if messages:
+            st.markdown(
+                "".join(self.message_html(message, current_user) for message in messages),
+                unsafe_allow_html=True
+            )
+    
+    def display_message(self, message, current_user):
+        """Display a single chat message"""
+        self.display_messages([message], current_user)
     
     def show_message_input(self, room, user):
         """Display message input form"""
@@ -124,56 +489,122 @@ class ChatSystem:
             
             if send_button and message.strip():
                 self.send_message(user['username'], room, message.strip())
-                st.rerun()
+                rerun_fragment()
     
     def send_message(self, username, club, message):
         """Send a new message"""
+        self._ensure_partitioned()
+        data_manager = st.session_state.data_manager
         message_data = {
+            'id': data_manager.reserve_ids(CHAT_TABLE, 1, at_least=self._id_floor)[0],
             'username': username,
             'club': club,
             'message': message,
             'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'deleted': False
+            'deleted': False,
+            'deleted_date': ''
         }
         
-        if st.session_state.data_manager.add_record('chat_logs', message_data):
-            # Add notification for new message
+        segment = room_segment(club)
+        if data_manager.add_record(segment, message_data):
+            self._remember(segment, message_data)
+            # Add notification for new message, merged with the room's recent unread one
             st.session_state.notification_system.add_notification(
                 f"새 메시지 ({club})",
                 "info",
                 "all",
-                f"{username}: {message[:50]}{'...' if len(message) > 50 else ''}"
+                f"{username}: {message[:50]}{'...' if len(message) > 50 else ''}",
+                coalesce_key=f"chat:{club}",
+                coalesced_title=f"새 메시지 {{count}}건 ({club})"
             )
             return True
         return False
     
-    def delete_message(self, message_id):
-        """Mark a message as deleted"""
-        return st.session_state.data_manager.update_record('chat_logs', message_id, {'deleted': True})
+    def delete_message(self, message_id, room):
+        """Mark a message of a room as deleted; compact_messages() archives it after the grace period"""
+        data_manager = st.session_state.data_manager
+        segment = room_segment(room)
+        updates = {'deleted': True, 'deleted_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+        # Under the tombstone file lock, so a compaction can't record the segment clean in between
+        with file_lock(os.path.join(data_manager.data_dir, TOMBSTONES_FILE) + '.lock'):
+            if not data_manager.update_record(segment, message_id, updates):
+                return False
+            self._record_tombstones(data_manager.data_dir, segment, None, added=1)
+        with self._buffer_lock:
+            for row in self._buffers.get(segment, {}).get('rows', ()):
+                if row['id'] == message_id:
+                    row.update(updates)
+        return True
     
-    def get_recent_messages(self, room, limit=50):
-        """Get recent messages for a room"""
-        chat_df = st.session_state.data_manager.load_csv('chat_logs')
-        
-        if chat_df.empty:
-            return pd.DataFrame()
+    def _archive_messages(self, data_manager, rows):
+        """Append rows to data/archive/chat_logs-<YYYY-MM>.csv.gz by month of timestamp"""
+        archive_dir = os.path.join(data_manager.data_dir, CHAT_ARCHIVE_DIR)
+        os.makedirs(archive_dir, exist_ok=True)
+        rows = rows.reindex(columns=TABLE_SCHEMAS[CHAT_TABLE])
+        months = pd.to_datetime(rows['timestamp'], errors='coerce').dt.strftime('%Y-%m').fillna('unknown')
+        for month, month_rows in rows.groupby(months):
+            path = os.path.join(archive_dir, f'{CHAT_TABLE}-{month}.csv.gz')
+            header = not os.path.exists(path)
+            # Each append is its own gzip member; gzip and read_csv read them back as one file
+            with gzip.open(path, 'at', encoding='utf-8', newline='') as f:
+                month_rows.to_csv(f, index=False, header=header)
+    
+    def compact_messages(self, data_manager=None, now=None):
+        """Move tombstones older than CHAT_TOMBSTONE_GRACE_DAYS out of every room segment; returns a report dict.
         
-        # Filter by room
-        if room != "전체":
-            room_messages = chat_df[
-                (chat_df['club'] == room) & 
-                (chat_df['deleted'] != True)
-            ]
-        else:
-            room_messages = chat_df[chat_df['deleted'] != True]
+        Each segment with such tombstones is rewritten without them, and the
+        tombstones it has left are recorded so readers can skip the deleted
+        filter on segments that have none. The report has row counts and
+        segment sizes in bytes before and after.
+        """
+        data_manager = data_manager or st.session_state.data_manager
+        now = now or datetime.now()
+        cutoff = now - timedelta(days=CHAT_TOMBSTONE_GRACE_DAYS)
+        segments = segment_tables(data_manager)
+        report = {
+            'segments': len(segments), 'rows_before': 0, 'rows_after': 0,
+            'bytes_before': 0, 'bytes_after': 0, 'archived': 0, 'tombstones_left': 0,
+        }
         
-        # Sort and limit
-        room_messages = room_messages.sort_values('timestamp', ascending=False).head(limit)
-        return room_messages.sort_values('timestamp')
+        with file_lock(os.path.join(data_manager.data_dir, TOMBSTONES_FILE) + '.lock'):
+            for segment in segments:
+                with data_manager.storage.locked(segment):
+                    messages = data_manager.load_csv(segment)
+                    report['rows_before'] += len(messages)
+                    report['bytes_before'] += data_manager.table_size(segment) or 0
+                    
+                    archived = pd.Series(False, index=messages.index)
+                    deleted = archived
+                    if not messages.empty:
+                        deleted = messages['deleted'] == True
+                        # Tombstones from before deleted_date existed age from the message itself
+                        deleted_at = pd.to_datetime(messages['timestamp'], errors='coerce')
+                        if 'deleted_date' in messages.columns:
+                            deleted_at = pd.to_datetime(messages['deleted_date'], errors='coerce').fillna(deleted_at)
+                        archived = deleted & (deleted_at <= cutoff)
+                    
+                    if archived.any():
+                        self._archive_messages(data_manager, messages[archived])
+                        data_manager.save_csv(segment, messages[~archived])
+                        with self._buffer_lock:
+                            self._buffers.pop(segment, None)
+                    
+                    left = int((deleted & ~archived).sum())
+                    self._record_tombstones(data_manager.data_dir, segment, left)
+                    report['archived'] += int(archived.sum())
+                    report['tombstones_left'] += left
+                    report['rows_after'] += len(messages) - int(archived.sum())
+                    report['bytes_after'] += data_manager.table_size(segment) or 0
+        return report
+    
+    def get_recent_messages(self, room, limit=50):
+        """Get recent messages for a room"""
+        return self.get_messages_page(room, limit)[0]
     
     def get_chat_statistics(self, club=None):
         """Get chat statistics"""
-        chat_df = st.session_state.data_manager.load_csv('chat_logs')
+        # Only the club's own segment is read when a club is given
+        chat_df = self.load_messages([club] if club and club != "전체" else None)
         
         if chat_df.empty:
             return {
@@ -182,13 +613,6 @@ class ChatSystem:
                 'messages_today': 0
             }
         
-        # Filter by club if specified
-        if club and club != "전체":
-            chat_df = chat_df[chat_df['club'] == club]
-        
-        # Filter non-deleted messages
-        chat_df = chat_df[chat_df['deleted'] != True]
-        
         # Calculate statistics
         total_messages = len(chat_df)
         active_users = chat_df['username'].nunique()
@@ -1,47 +1,157 @@
 import pandas as pd
 import os
+import json
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 import streamlit as st
+from storage_backends import create_storage, file_lock, merge_changes, query_frame, tail_frame, update_frame
+
+# Storage engine for every DataManager: 'csv' (default), 'columnar' or 'sqlite'.
+# 'columnar' keeps attendance/notifications/chat_logs as Parquet (needs pyarrow)
+# and converts their CSV files on first start.
+# Run `python storage_backends.py migrate` once before switching to sqlite.
+STORAGE_BACKEND = os.environ.get('CLUBSYSTEM_STORAGE', 'csv')
+
+# Next free id per table lives in a sidecar file next to the CSVs.
+# Tables listed here were checked against their file's max id by this process.
+SEQUENCES_FILE = '.sequences.json'
+_RECONCILED_SEQUENCES = set()
+
+# Bump SCHEMA_VERSION whenever TABLE_SCHEMAS or the seed data change, so
+# existing data directories run bootstrap() again. The applied version is
+# recorded per storage engine in BOOTSTRAP_FILE.
+SCHEMA_VERSION = 5
+BOOTSTRAP_FILE = '.bootstrap.json'
+_BOOTSTRAP_LOCK = threading.Lock()
+_BOOTSTRAPPED = set()
+
+# Columns every table starts with; tables are created empty except for the
+# seeded users and clubs
+TABLE_SCHEMAS = {
+    'users': ['username', 'password', 'name', 'role', 'club_name', 'club_role', 'created_date'],
+    'clubs': ['name', 'icon', 'description', 'president', 'max_members', 'created_date', 'meet_link'],
+    'posts': ['id', 'title', 'content', 'author', 'club', 'created_date', 'likes', 'comments', 'image_path', 'tags'],
+    # Messages live in one chat_logs__<room> table per room (see chat_system);
+    # chat_logs itself only receives legacy/restored rows to be partitioned
+    'chat_logs': ['id', 'username', 'club', 'message', 'timestamp', 'deleted', 'deleted_date'],
+    'assignments': ['id', 'title', 'description', 'club', 'creator', 'due_date', 'status', 'created_date'],
+    'submissions': ['id', 'assignment_id', 'username', 'content', 'file_path', 'submitted_date', 'grade', 'feedback'],
+    'attendance': ['id', 'username', 'club', 'date', 'status', 'note', 'recorded_by'],
+    'schedule': ['id', 'title', 'description', 'club', 'date', 'time', 'location', 'creator', 'created_date'],
+    'votes': ['id', 'title', 'description', 'options', 'club', 'creator', 'end_date', 'status', 'allow_multiple', 'created_date'],
+    'badges': ['id', 'username', 'badge_name', 'badge_icon', 'description', 'awarded_date', 'awarded_by'],
+    'notifications': ['id', 'username', 'title', 'message', 'type', 'read', 'created_date', 'audience', 'reminder_key', 'group_key', 'count'],
+    'notification_reads': ['id', 'notification_id', 'username', 'status', 'created_date'],
+    # One row per notification merged into a coalesced group (see notification_system)
+    'notification_merges': ['id', 'notification_id', 'title', 'message', 'count', 'created_date'],
+    'quizzes': ['id', 'title', 'description', 'club', 'creator', 'questions', 'time_limit', 'attempts_allowed', 'status', 'created_date'],
+    'quiz_responses': ['id', 'quiz_id', 'username', 'answers', 'score', 'total_questions', 'completed_date', 'time_taken'],
+    'vote_responses': ['id', 'vote_id', 'username', 'selected_options', 'voted_date'],
+    'video_conferences': ['id', 'title', 'description', 'club', 'organizer', 'meeting_url', 'password', 'scheduled_date', 'duration', 'status', 'participants', 'created_date'],
+    'gallery': ['id', 'title', 'description', 'image_path', 'uploader', 'club', 'tags', 'likes', 'created_date'],
+}
+
 
 class DataManager:
-    def __init__(self):
+    def __init__(self, backend=None):
         self.data_dir = 'data'
         self.ensure_data_directory()
-        self.initialize_csv_files()
+        self.storage = create_storage(backend or STORAGE_BACKEND, self.data_dir)
+        self._pending = threading.local()
+        self._snapshots = threading.local()
+        self.bootstrap()
 
     def ensure_data_directory(self):
         """Create data directory if it doesn't exist"""
         if not os.path.exists(self.data_dir):
             os.makedirs(self.data_dir)
 
+    def bootstrap(self):
+        """Create missing tables and seed data, once per process and schema version.
+
+        Later processes whose data directory already carries the current
+        SCHEMA_VERSION only check that every table still exists.
+        """
+        key = (os.path.abspath(self.data_dir), self.storage.name)
+        with _BOOTSTRAP_LOCK:
+            if key in _BOOTSTRAPPED:
+                return
+
+            marker_path = os.path.join(self.data_dir, BOOTSTRAP_FILE)
+            with file_lock(marker_path + '.lock'):
+                try:
+                    with open(marker_path, 'r', encoding='utf-8') as f:
+                        applied = json.load(f)
+                except (FileNotFoundError, ValueError):
+                    applied = {}
+
+                up_to_date = applied.get(self.storage.name) == SCHEMA_VERSION
+                if not up_to_date or not all(self.storage.exists(table) for table in TABLE_SCHEMAS):
+                    self.initialize_csv_files()
+                    applied[self.storage.name] = SCHEMA_VERSION
+                    tmp_path = marker_path + '.tmp'
+                    with open(tmp_path, 'w', encoding='utf-8') as f:
+                        json.dump(applied, f)
+                    os.replace(tmp_path, marker_path)
+
+            _BOOTSTRAPPED.add(key)
+
     def initialize_csv_files(self):
         """Initialize all CSV files with headers if they don't exist"""
-        csv_structures = {
-            'clubs.csv': ['name', 'icon', 'description', 'president', 'max_members', 'created_date', 'meet_link'],
-            'posts.csv': ['id', 'title', 'content', 'author', 'club', 'created_date', 'likes', 'comments', 'image_path', 'tags'],
-            'chat_logs.csv': ['id', 'username', 'club', 'message', 'timestamp', 'deleted'],
-            'assignments.csv': ['id', 'title', 'description', 'club', 'creator', 'due_date', 'status', 'created_date'],
-            'submissions.csv': ['id', 'assignment_id', 'username', 'content', 'file_path', 'submitted_date', 'grade', 'feedback'],
-            'attendance.csv': ['id', 'username', 'club', 'date', 'status', 'note', 'recorded_by'],
-            'schedule.csv': ['id', 'title', 'description', 'club', 'date', 'time', 'location', 'creator', 'created_date'],
-            'votes.csv': ['id', 'title', 'description', 'options', 'club', 'creator', 'end_date', 'created_date'],
-            'badges.csv': ['id', 'username', 'badge_name', 'badge_icon', 'description', 'awarded_date', 'awarded_by'],
-            'notifications.csv': ['id', 'username', 'title', 'message', 'type', 'read', 'created_date']
-        }
-
-        for filename, columns in csv_structures.items():
-            filepath = os.path.join(self.data_dir, filename)
-            if not os.path.exists(filepath):
-                df = pd.DataFrame(columns=columns)
-                df.to_csv(filepath, index=False, encoding='utf-8-sig')
+        # Seed users before the empty tables so a fresh install gets the default accounts
+        self.initialize_users()
+
+        for table, columns in TABLE_SCHEMAS.items():
+            if not self.storage.exists(table):
+                self.storage.write(table, pd.DataFrame(columns=columns))
 
         # Initialize clubs.csv with default clubs
         self.initialize_clubs()
 
+    def initialize_users(self):
+        """Initialize users.csv with default accounts if it doesn't exist"""
+        if not self.storage.exists('users'):
+            # Create initial user accounts based on the provided data
+            initial_users = [
+                # Teacher accounts
+                {'username': '조성우', 'password': 'admin', 'name': '조성우', 'role': '선생님', 'club_name': '코딩', 'club_role': '선생님', 'created_date': '2024-01-15 09:00:00'},
+                {'username': '장원진', 'password': '12341234', 'name': '장원진', 'role': '선생님', 'club_name': '전체', 'club_role': '선생님', 'created_date': '2024-01-15 09:00:00'},
+
+                # Students with their club assignments
+                {'username': '강서준', 'password': '1234', 'name': '강서준', 'role': '총무', 'club_name': '코딩', 'club_role': '총무', 'created_date': '2024-01-15 09:07:00'},
+                {'username': '곽승현', 'password': '1234', 'name': '곽승현', 'role': '동아리원', 'club_name': '미스테리탐구', 'club_role': '동아리원', 'created_date': '2024-01-15 09:07:00'},
+                {'username': '김민아', 'password': '1234', 'name': '김민아', 'role': '동아리원', 'club_name': '줄넘기', 'club_role': '동아리원', 'created_date': '2024-01-15 09:07:00'},
+                {'username': '김보경', 'password': '1234', 'name': '김보경', 'role': '회장', 'club_name': '만들기', 'club_role': '회장', 'created_date': '2024-01-15 09:07:00'},
+                {'username': '김보민', 'password': '1234', 'name': '김보민', 'role': '동아리원', 'club_name': '만들기', 'club_role': '동아리원', 'created_date': '2024-01-15 09:07:00'},
+                {'username': '김영원', 'password': '1234', 'name': '김영원', 'role': '동아리원', 'club_name': '만들기', 'club_role': '동아리원', 'created_date': '2024-01-15 09:07:00'},
+                {'username': '김의준', 'password': '1234', 'name': '김의준', 'role': '동아리원', 'club_name': '미스테리탐구', 'club_role': '동아리원', 'created_date': '2024-01-15 09:07:00'},
+                {'username': '김제이', 'password': '1234', 'name': '김제이', 'role': '회장', 'club_name': '줄넘기', 'club_role': '회장', 'created_date': '2024-01-15 09:07:00'},
+                {'username': '김현서', 'password': '1234', 'name': '김현서', 'role': '동아리원', 'club_name': '풍선아트', 'club_role': '동아리원', 'created_date': '2024-01-15 09:07:00'},
+                {'username': '박규혁', 'password': '1234', 'name': '박규혁', 'role': '부회장', 'club_name': '풍선아트', 'club_role': '부회장', 'created_date': '2024-01-15 09:07:00'},
+                {'username': '박효주', 'password': '1234', 'name': '박효주', 'role': '부회장', 'club_name': '미스테리탐구', 'club_role': '부회장', 'created_date': '2024-01-15 09:07:00'},
+                {'username': '배다인', 'password': '1234', 'name': '배다인', 'role': '부회장', 'club_name': '댄스', 'club_role': '부회장', 'created_date': '2024-01-15 09:07:00'},
+                {'username': '백주아', 'password': '1234', 'name': '백주아', 'role': '회장', 'club_name': '댄스', 'club_role': '회장', 'created_date': '2024-01-15 09:07:00'},
+                {'username': '신소민', 'password': '1234', 'name': '신소민', 'role': '동아리원', 'club_name': '미스테리탐구', 'club_role': '동아리원', 'created_date': '2024-01-15 09:07:00'},
+                {'username': '오채윤', 'password': '1234', 'name': '오채윤', 'role': '회장', 'club_name': '미스테리탐구', 'club_role': '회장', 'created_date': '2024-01-15 09:07:00'},
+                {'username': '유수현', 'password': '1234', 'name': '유수현', 'role': '동아리원', 'club_name': '댄스', 'club_role': '동아리원', 'created_date': '2024-01-15 09:07:00'},
+                {'username': '장주원', 'password': '1234', 'name': '장주원', 'role': '총무', 'club_name': '코딩', 'club_role': '총무', 'created_date': '2024-01-15 09:07:00'},
+                {'username': '전준오', 'password': '1234', 'name': '전준오', 'role': '동아리원', 'club_name': '코딩', 'club_role': '동아리원', 'created_date': '2024-01-15 09:07:00'},
+                {'username': '정예준', 'password': '1234', 'name': '정예준', 'role': '동아리원', 'club_name': '미스테리탐구', 'club_role': '동아리원', 'created_date': '2024-01-15 09:07:00'},
+                {'username': '정지호', 'password': '1234', 'name': '정지호', 'role': '동아리원', 'club_name': '미스테리탐구', 'club_role': '동아리원', 'created_date': '2024-01-15 09:07:00'},
+                {'username': '정찬희', 'password': '1234', 'name': '정찬희', 'role': '부회장', 'club_name': '코딩', 'club_role': '부회장', 'created_date': '2024-01-15 09:07:00'},
+                {'username': '최명준', 'password': '1234', 'name': '최명준', 'role': '회장', 'club_name': '풍선아트', 'club_role': '회장', 'created_date': '2024-01-15 09:07:00'},
+                {'username': '한동길', 'password': '1234', 'name': '한동길', 'role': '동아리원', 'club_name': '풍선아트', 'club_role': '동아리원', 'created_date': '2024-01-15 09:07:00'},
+                {'username': '한수진', 'password': '1234', 'name': '한수진', 'role': '동아리원', 'club_name': '댄스', 'club_role': '동아리원', 'created_date': '2024-01-15 09:07:00'},
+                {'username': '황하정', 'password': '1234', 'name': '황하정', 'role': '동아리원', 'club_name': '줄넘기', 'club_role': '동아리원', 'created_date': '2024-01-15 09:07:00'}
+            ]
+
+            df = pd.DataFrame(initial_users)
+            self.storage.write('users', df)
+
     def initialize_clubs(self):
         """Initialize clubs with default data"""
-        clubs_file = os.path.join(self.data_dir, 'clubs.csv')
-        clubs_df = pd.read_csv(clubs_file, encoding='utf-8-sig')
+        clubs_df = self.storage.read('clubs')
 
         if clubs_df.empty:
             default_clubs = [
@@ -102,30 +212,148 @@ class DataManager:
             ]
 
             df = pd.DataFrame(default_clubs)
-            df.to_csv(clubs_file, index=False, encoding='utf-8-sig')
+            self.storage.write('clubs', df)
+
+    @staticmethod
+    def _table_name(filename):
+        """Strip the .csv suffix callers use interchangeably with bare table names"""
+        return filename[:-4] if filename.endswith('.csv') else filename
+
+    def _staged(self):
+        """Tables buffered by this thread's open transaction, or None outside one"""
+        return getattr(self._pending, 'tables', None)
+
+    def in_transaction(self):
+        """Whether this thread's writes are currently buffered by transaction()"""
+        return self._staged() is not None
+
+    def _loaded(self):
+        """table -> (version, frame) as this thread last loaded or saved it"""
+        loaded = getattr(self._snapshots, 'tables', None)
+        if loaded is None:
+            loaded = self._snapshots.tables = {}
+        return loaded
+
+    def _write_tables(self, tables):
+        """Write whole tables under their locks, merging with concurrent writes.
+
+        A table changed on disk since this thread loaded it is not clobbered:
+        the rows and cells this thread changed are replayed onto the current
+        data instead (merge_changes). Tables this thread never loaded are
+        written as given.
+        """
+        loaded = self._loaded()
+        with self.storage.locked(*tables):
+            to_write = {}
+            for table, df in tables.items():
+                snapshot = loaded.get(table)
+                if snapshot and self.storage.exists(table) and self.storage.version(table) != snapshot[0]:
+                    df = merge_changes(snapshot[1], df, self.storage.read(table))
+                to_write[table] = df
+            self.storage.write_many(to_write)
+            for table, df in to_write.items():
+                loaded[table] = (self.storage.version(table), df)
+
+    @contextmanager
+    def transaction(self):
+        """Buffer every write in the block and flush each touched table once on exit.
+
+        Reads inside the block see the buffered changes. The flush goes through
+        the storage engine's write_many (temp files + os.replace for CSV, one
+        transaction for SQLite). Any exception, including a Streamlit rerun
+        interrupting the script, discards the buffer so nothing is half-written.
+        Nested transactions join the outer one.
+        """
+        if self._staged() is not None:
+            yield self
+            return
+
+        self._pending.tables = {}
+        try:
+            yield self
+        except BaseException:
+            self._pending.tables = None
+            raise
+
+        tables, self._pending.tables = self._pending.tables, None
+        if tables:
+            self._write_tables(tables)
 
     def load_csv(self, filename):
         """Load CSV file and return DataFrame"""
         try:
-            if not filename.endswith('.csv'):
-                filename += '.csv'
-            filepath = os.path.join(self.data_dir, filename)
-
-            if os.path.exists(filepath):
-                return pd.read_csv(filepath, encoding='utf-8-sig')
+            table = self._table_name(filename)
+            staged = self._staged()
+            if staged is not None and table in staged:
+                return staged[table].copy()
+            if self.storage.exists(table):
+                # Remember what was read so save_csv can detect concurrent writes
+                version, df = self.storage.read_versioned(table)
+                self._loaded()[table] = (version, df)
+                return df.copy()
             else:
                 return pd.DataFrame()
         except Exception as e:
             st.error(f"Error loading {filename}: {e}")
             return pd.DataFrame()
 
+    def query(self, filename, where=None, columns=None, order_by=None, ascending=True, limit=None, between=None):
+        """Load only the matching rows and requested columns of a table.
+
+        where maps column -> value (equality) or column -> list of values
+        (membership); between maps column -> (low, high), an inclusive range
+        compared as text ('YYYY-MM-DD' dates) with None for an open end. The
+        storage engine runs the filter itself: CSV tables parse just the
+        needed columns, Parquet tables also skip row groups outside the
+        range, SQLite tables use their indexes.
+        """
+        try:
+            table = self._table_name(filename)
+            staged = self._staged()
+            if staged is not None and table in staged:
+                return query_frame(staged[table], where, columns, order_by, ascending, limit, between).copy()
+            if not self.storage.exists(table):
+                return pd.DataFrame()
+            return self.storage.query(table, where, columns, order_by, ascending, limit, between).copy()
+        except Exception as e:
+            st.error(f"Error querying {filename}: {e}")
+            return pd.DataFrame()
+
+    def tail(self, filename, limit, where=None, before_id=None):
+        """The newest limit rows of an append-only table, oldest first.
+
+        where filters by equality/membership as in query(); before_id keeps
+        only rows with a smaller id, for paging further back. The engine
+        reads just the end of the table where it can.
+        """
+        try:
+            table = self._table_name(filename)
+            staged = self._staged()
+            if staged is not None and table in staged:
+                return tail_frame(staged[table], limit, where, before_id).copy()
+            if not self.storage.exists(table):
+                return pd.DataFrame()
+            return self.storage.tail(table, limit, where, before_id).copy()
+        except Exception as e:
+            st.error(f"Error reading {filename}: {e}")
+            return pd.DataFrame()
+
+    def invalidate_cache(self, filename=None):
+        """Drop cached tables (all of them when filename is None)"""
+        self.storage.invalidate(self._table_name(filename) if filename else None)
+
+    def table_size(self, filename):
+        """Bytes a table takes in the storage engine (None if the engine can't tell)"""
+        return self.storage.size(self._table_name(filename))
+
     def save_csv(self, filename, dataframe):
         """Save DataFrame to CSV file"""
         try:
-            if not filename.endswith('.csv'):
-                filename += '.csv'
-            filepath = os.path.join(self.data_dir, filename)
-            dataframe.to_csv(filepath, index=False, encoding='utf-8-sig')
+            staged = self._staged()
+            if staged is not None:
+                staged[self._table_name(filename)] = dataframe.copy()
+                return True
+            self._write_tables({self._table_name(filename): dataframe.copy()})
             return True
         except Exception as e:
             st.error(f"Error saving {filename}: {e}")
@@ -134,7 +362,7 @@ class DataManager:
     def get_user_clubs(self, username):
         """Get clubs that user belongs to"""
         try:
-            users_df = pd.read_csv(os.path.join(self.data_dir, 'users.csv'), encoding='utf-8-sig')
+            users_df = self.load_csv('users')
             user_clubs = users_df[users_df['username'] == username][['club_name', 'club_role']]
             user_clubs = user_clubs.rename(columns={'club_role': 'role'})
             return user_clubs
@@ -143,71 +371,185 @@ class DataManager:
 
     def generate_id(self, filename):
         """Generate unique ID for new records"""
+        return self.reserve_ids(filename)[0]
+
+    def reserve_ids(self, filename, count=1, at_least=1):
+        """Reserve a block of consecutive IDs for a table and return them as a range.
+
+        The next free id is kept in a sidecar sequence file guarded by a file
+        lock, so concurrent sessions never hand out the same id. The first
+        reservation per table in a process, and the first after import_table
+        restored it, is reconciled with the table's current max id.
+        at_least raises the next id further, for sequences shared by tables
+        the reconciliation doesn't see (e.g. partitions).
+        """
+        filename = self._table_name(filename)
+        sequences_path = os.path.join(self.data_dir, SEQUENCES_FILE)
+
+        with file_lock(sequences_path + '.lock'):
+            try:
+                with open(sequences_path, 'r', encoding='utf-8') as f:
+                    sequences = json.load(f)
+            except (FileNotFoundError, ValueError):
+                sequences = {}
+
+            next_id = max(int(sequences.get(filename, 1)), at_least)
+            if filename not in _RECONCILED_SEQUENCES:
+                next_id = max(next_id, self._max_id(filename) + 1)
+                _RECONCILED_SEQUENCES.add(filename)
+
+            sequences[filename] = next_id + count
+            tmp_path = sequences_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(sequences, f, ensure_ascii=False)
+            os.replace(tmp_path, sequences_path)
+
+        return range(next_id, next_id + count)
+
+    def _max_id(self, filename):
+        """Largest id currently stored in a table (0 when there is none)"""
         df = self.load_csv(filename)
         if df.empty or 'id' not in df.columns:
-            return 1
-        return df['id'].max() + 1 if not df['id'].isna().all() else 1
+            return 0
+        ids = pd.to_numeric(df['id'], errors='coerce')
+        return 0 if ids.isna().all() else int(ids.max())
 
     def add_record(self, filename, record):
         """Add new record to CSV file"""
+        return self.add_records(filename, [record])
+
+    def add_records(self, filename, records):
+        """Add many records with one id reservation and a single write"""
         try:
-            df = self.load_csv(filename)
+            if not records:
+                return True
 
-            # Generate ID if not provided
-            if 'id' not in record:
-                record['id'] = self.generate_id(filename)
+            # Generate IDs for records that don't carry one, as a single block
+            missing_id = [record for record in records if 'id' not in record]
+            if missing_id:
+                for record, new_id in zip(missing_id, self.reserve_ids(filename, len(missing_id))):
+                    record['id'] = new_id
 
             # Add timestamp if not provided
-            if 'created_date' not in record:
-                record['created_date'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            for record in records:
+                if 'created_date' not in record:
+                    record['created_date'] = now
 
-            df = pd.concat([df, pd.DataFrame([record])], ignore_index=True)
+            # Rows that fit the existing header are appended in place; only a
+            # schema change (new column or missing file) rewrites the table
+            if self.append_rows(filename, records):
+                return True
+
+            df = self.load_csv(filename)
+            df = pd.concat([df, pd.DataFrame(records)], ignore_index=True)
             return self.save_csv(filename, df)
         except Exception as e:
-            st.error(f"Error adding record to {filename}: {e}")
+            st.error(f"Error adding records to {filename}: {e}")
+            return False
+
+    def read_header(self, filename):
+        """Return the column names of a table without loading its rows"""
+        table = self._table_name(filename)
+        staged = self._staged()
+        if staged is not None and table in staged:
+            return list(staged[table].columns)
+        return self.storage.columns(table)
+
+    def append_rows(self, filename, records):
+        """Append records to an existing table without rewriting it.
+
+        Returns False when the table does not exist yet or the records carry
+        columns it does not have, so the caller can fall back to a full rewrite.
+        """
+        table = self._table_name(filename)
+        staged = self._staged()
+        if staged is None:
+            return self.storage.append(table, records)
+
+        columns = self.read_header(table)
+        if not columns or any(key not in columns for record in records for key in record):
             return False
+        staged[table] = pd.concat(
+            [self.load_csv(table), pd.DataFrame(records, columns=columns)], ignore_index=True
+        )
+        return True
 
     def update_record(self, filename, record_id, updates):
         """Update existing record in CSV file"""
+        return self.update_records(filename, {record_id: updates}) > 0
+
+    def update_records(self, filename, updates_by_id):
+        """Apply {record_id: updates} with a single write; returns the number of rows updated"""
         try:
-            df = self.load_csv(filename)
-            if df.empty:
-                return False
-
-            # Find and update the record
-            mask = df['id'] == record_id
-            if mask.any():
-                for key, value in updates.items():
-                    # Handle type conversion carefully
-                    if key in df.columns:
-                        try:
-                            # If column has a specific dtype and value is compatible, convert
-                            if df[key].dtype != 'object' and pd.notna(value):
-                                if df[key].dtype in ['int64', 'float64'] and str(value).replace('.', '').replace('-', '').isdigit():
-                                    value = pd.to_numeric(value, errors='coerce')
-                            df.loc[mask, key] = value
-                        except (ValueError, TypeError):
-                            # If conversion fails, convert column to object type
-                            df[key] = df[key].astype('object')
-                            df.loc[mask, key] = value
-                    else:
-                        df.loc[mask, key] = value
-
-                # Save updated data
-                return self.save_csv(filename, df)
-            return False
+            table = self._table_name(filename)
+            staged = self._staged()
+            if staged is not None:
+                df = self.load_csv(table)
+                if df.empty:
+                    return 0
+                df, updated = update_frame(df, updates_by_id)
+                if updated:
+                    staged[table] = df
+                return updated
+            if not updates_by_id or not self.storage.exists(table):
+                return 0
+            return self.storage.update_many(table, updates_by_id)
         except Exception as e:
-            st.error(f"Error updating record in {filename}: {e}")
-            return False
+            st.error(f"Error updating records in {filename}: {e}")
+            return 0
 
     def delete_record(self, filename, record_id):
         """Delete record from CSV file"""
+        return self.delete_records(filename, [record_id]) is not None
+
+    def delete_records(self, filename, record_ids):
+        """Delete every record in record_ids with a single write.
+
+        Returns the number of rows removed, or None if the write failed.
+        """
         try:
-            df = self.load_csv(filename)
-            df = df[df['id'] != record_id]
-            return self.save_csv(filename, df)
+            table = self._table_name(filename)
+            staged = self._staged()
+            if staged is not None:
+                df = self.load_csv(table)
+                keep = ~df['id'].isin(list(record_ids))
+                staged[table] = df[keep]
+                return int((~keep).sum())
+            return self.storage.delete_many(table, record_ids)
+        except Exception as e:
+            st.error(f"Error deleting records from {filename}: {e}")
+            return None
+
+    def export_table(self, zipf, filename):
+        """Write a table into an open backup zip as <table>.csv, whatever engine stores it.
+
+        Returns False (writing nothing) for a table that doesn't exist.
+        """
+        table = self._table_name(filename)
+        if not self.storage.exists(table):
+            return False
+        if self.storage.name == 'csv':
+            zipf.write(self.storage.path(table), f'{table}.csv')
+        else:
+            csv_data = self.load_csv(table).to_csv(index=False)
+            zipf.writestr(f'{table}.csv', '\ufeff' + csv_data)
+        return True
+
+    def import_table(self, filename, source):
+        """Replace a table with the rows of a backed-up CSV (a path or file object)"""
+        try:
+            table = self._table_name(filename)
+            df = pd.read_csv(source, encoding='utf-8-sig')
+            # Holding the sequence lock too, no id is reserved between the write and
+            # forgetting the reconciliation, which makes the next reservation see restored ids
+            with self.storage.locked(table), file_lock(os.path.join(self.data_dir, SEQUENCES_FILE) + '.lock'):
+                self.storage.write(table, df)
+                self._loaded()[table] = (self.storage.version(table), df)
+                _RECONCILED_SEQUENCES.discard(table)
+            return True
         except Exception as e:
-            st.error(f"Error deleting record from {filename}: {e}")
+            st.error(f"Error restoring {filename}: {e}")
             return False
 
     def backup_data(self):
@@ -219,9 +561,8 @@ class DataManager:
             backup_filename = f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
 
             with zipfile.ZipFile(backup_filename, 'w') as zipf:
-                for filename in os.listdir(self.data_dir):
-                    if filename.endswith('.csv'):
-                        zipf.write(os.path.join(self.data_dir, filename), filename)
+                for table in self.storage.list_tables():
+                    self.export_table(zipf, table)
 
             return backup_filename
         except Exception as e:
@@ -1,9 +1,7 @@
 import streamlit as st
-import pandas as pd
 from datetime import datetime
 import base64
 import os
-from PIL import Image
 import io
 
 class GallerySystem:
@@ -11,20 +9,11 @@ class GallerySystem:
         self.data_manager = None
     
     def initialize_gallery_files(self):
-        """Initialize gallery-related CSV files"""
+        """Bind the data manager (gallery.csv is created by DataManager.bootstrap)"""
         if not hasattr(st.session_state, 'data_manager'):
             return
         
         self.data_manager = st.session_state.data_manager
-        
-        # Gallery CSV structure
-        gallery_headers = ['id', 'title', 'description', 'image_path', 'uploader', 'club', 'tags', 'likes', 'created_date']
-        
-        # Initialize if not exists
-        gallery_df = self.data_manager.load_csv('gallery')
-        if gallery_df.empty:
-            gallery_df = pd.DataFrame(columns=gallery_headers)
-            self.data_manager.save_csv('gallery', gallery_df)
     
     def show_gallery_interface(self, user):
         """Display the gallery interface"""
@@ -68,6 +57,8 @@ class GallerySystem:
     
     def show_gallery_item(self, post, user):
         """Display a single gallery item"""
+        from PIL import Image
+
         try:
             # Display image
             if post['image_data']:
@@ -93,6 +84,8 @@ class GallerySystem:
     
     def process_uploaded_image(self, uploaded_file):
         """Process uploaded image and return base64 encoded string"""
+        from PIL import Image
+
         if uploaded_file is not None:
             try:
                 image = Image.open(uploaded_file)
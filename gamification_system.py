@@ -24,8 +24,9 @@ class GamificationSystem:
     
     def calculate_points(self, username):
         """사용자 포인트 계산"""
-        attendance_df = st.session_state.data_manager.load_csv('attendance')
-        user_records = attendance_df[attendance_df['username'] == username]
+        user_records = st.session_state.data_manager.query(
+            'attendance', where={'username': username}, columns=['status']
+        )
         
         total_points = 0
         for _, record in user_records.iterrows():
@@ -53,13 +54,14 @@ class GamificationSystem:
     
     def get_attendance_streak(self, username):
         """연속 출석일 계산"""
-        attendance_df = st.session_state.data_manager.load_csv('attendance')
-        user_records = attendance_df[attendance_df['username'] == username]
+        user_records = st.session_state.data_manager.query(
+            'attendance', where={'username': username}, columns=['date', 'status'],
+            order_by='date', ascending=False
+        )
         
         if user_records.empty:
             return 0
         
-        user_records = user_records.sort_values('date', ascending=False)
         streak = 0
         
         for _, record in user_records.iterrows():
@@ -72,13 +74,14 @@ class GamificationSystem:
     
     def check_monthly_perfect_attendance(self, username):
         """월 완벽 출석 확인"""
-        attendance_df = st.session_state.data_manager.load_csv('attendance')
+        user_records = st.session_state.data_manager.query(
+            'attendance', where={'username': username}, columns=['date', 'status']
+        )
         current_month = datetime.now().strftime('%Y-%m')
         
-        month_records = attendance_df[
-            (attendance_df['username'] == username) &
-            (attendance_df['date'].str.startswith(current_month))
-        ]
+        month_records = user_records[
+            user_records['date'].astype(str).str.startswith(current_month)
+        ] if not user_records.empty else user_records
         
         if month_records.empty:
             return False
@@ -90,13 +93,17 @@ class GamificationSystem:
         awarded_badges = []
         
         # 기존 뱃지 확인
-        badges_df = st.session_state.data_manager.load_csv('badges')
-        user_badges = badges_df[badges_df['username'] == username]['badge_name'].tolist() if not badges_df.empty else []
+        badges_df = st.session_state.data_manager.query(
+            'badges', where={'username': username}, columns=['badge_name']
+        )
+        user_badges = badges_df['badge_name'].tolist() if not badges_df.empty else []
         
         # 첫 출석 뱃지
         if '첫 걸음' not in user_badges:
-            attendance_df = st.session_state.data_manager.load_csv('attendance')
-            if not attendance_df[attendance_df['username'] == username].empty:
+            first_record = st.session_state.data_manager.query(
+                'attendance', where={'username': username}, columns=['id'], limit=1
+            )
+            if not first_record.empty:
                 self.award_badge(username, 'first_attendance')
                 awarded_badges.append('첫 걸음')
         
@@ -1,57 +1,398 @@
+import gzip
+import os
+import threading
+from contextlib import contextmanager
+
 import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta
+from data_manager import TABLE_SCHEMAS
+from ui_components import rerun_fragment
+
+# Broadcasts are stored as one notifications row with an audience ('all',
+# 'club:<name>' or 'role:<role>') and an empty username, and are fanned out
+# when a user reads their feed. Each user's read/dismissed state for them is
+# a row in RECEIPTS_TABLE; personal notifications keep their own 'read' flag.
+AUDIENCE_ALL = 'all'
+RECEIPTS_TABLE = 'notification_reads'
+
+# Tables the unread counters are derived from; a version change in any of
+# them that did not go through NotificationSystem drops the counters
+UNREAD_SOURCE_TABLES = ('notifications', RECEIPTS_TABLE, 'users')
+
+# Notifications per feed page; each page is fetched with its own bounded query
+NOTIFICATION_PAGE_SIZE = 20
+
+# Notifications added with the same coalesce_key for the same recipient
+# within this many minutes of the group's first one stay a single
+# notifications row. Each merged notification only appends a MERGES_TABLE
+# row with the group's new title, message and count, which readers show on
+# the group's row; compact_notifications() folds them into it.
+COALESCE_WINDOW_MINUTES = 30
+MERGES_TABLE = 'notification_merges'
+
+# Reminders collect_due_reminders() knows how to build
+REMINDER_KINDS = ('assignment', 'schedule')
+
+# Retention applied by compact_notifications(): days a notification is kept
+# by type, how many personal notifications each user keeps, and after how
+# many days read personal notifications move to the archive
+NOTIFICATION_TTL_DAYS = {'info': 30, 'success': 30, 'warning': 60, 'error': 60, 'announcement': 180}
+DEFAULT_NOTIFICATION_TTL_DAYS = 30
+NOTIFICATION_KEEP_PER_USER = 200
+NOTIFICATION_ARCHIVE_AFTER_DAYS = 14
+# The TTL and the per-user cap remove unread notifications only of the
+# low-value types below (logins, chat messages); other types must be read
+# first (a broadcast counts once everyone in its audience has a receipt).
+# Set CLUBSYSTEM_EXPIRE_UNREAD_NOTIFICATIONS=1 to remove unread ones of every type
+NOTIFICATION_EXPIRE_UNREAD_TYPES = ('info', 'success')
+NOTIFICATION_EXPIRE_UNREAD = os.environ.get('CLUBSYSTEM_EXPIRE_UNREAD_NOTIFICATIONS', '') == '1'
+# Archived rows go to gzip CSV partitions, one per month of created_date
+NOTIFICATION_ARCHIVE_DIR = 'archive'
+
+
+def club_audience(club_name):
+    """Audience of every member of a club ("전체" means everyone)"""
+    return AUDIENCE_ALL if club_name == "전체" else f"club:{club_name}"
+
+
+def role_audience(role):
+    """Audience of every user with a role"""
+    return f"role:{role}"
+
 
 class NotificationSystem:
     def __init__(self):
         self.notifications_file = 'data/notifications.csv'
+        # Materialized unread counts per username, with each counted user's
+        # audiences and the table versions the counts are valid for
+        self._unread_counts = {}
+        self._unread_audiences = {}
+        self._unread_versions = None
+        self._unread_lock = threading.Lock()
     
-    def add_notification(self, title, notification_type, target_user, message=""):
-        """Add a new notification"""
-        try:
-            notification_data = {
-                'username': target_user,
-                'title': title,
-                'message': message,
-                'type': notification_type,
-                'read': False,
-                'created_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
+    def build_notification(self, title, notification_type, username, message="", created_date=None):
+        """Build a notifications row without writing it"""
+        return {
+            'username': username,
+            'title': title,
+            'message': message,
+            'type': notification_type,
+            'read': False,
+            'created_date': created_date or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+    
+    def build_broadcast(self, title, notification_type, audience, message="", created_date=None):
+        """Build a single notifications row addressed to an audience"""
+        return dict(self.build_notification(title, notification_type, '', message, created_date), audience=audience)
+    
+    def _source_versions(self):
+        storage = st.session_state.data_manager.storage
+        return tuple(storage.version(table) for table in UNREAD_SOURCE_TABLES)
+    
+    @contextmanager
+    def _adjusting_unread(self):
+        """Hold the notification tables' write locks around a change and yield
+        a list collecting (username, audience, delta) counter adjustments.
+        
+        The adjustments are applied only when the counters were current before
+        the change; otherwise they are rebuilt lazily on the next lookup.
+        Inside a transaction the change is only buffered and may still roll
+        back, so the counters are dropped instead and rebuilt afterwards.
+        """
+        adjustments = []
+        data_manager = st.session_state.data_manager
+        with data_manager.storage.locked('notifications', RECEIPTS_TABLE):
+            before = self._source_versions()
+            yield adjustments
+            after = self._source_versions()
+            with self._unread_lock:
+                if data_manager.in_transaction():
+                    self._unread_versions = None
+                    return
+                if before != self._unread_versions:
+                    return
+                for username, audience, delta in adjustments:
+                    if audience is not None:
+                        targets = [u for u, audiences in self._unread_audiences.items() if audience in audiences]
+                    else:
+                        targets = [username] if username in self._unread_counts else []
+                    for target in targets:
+                        self._unread_counts[target] = max(0, self._unread_counts[target] + delta)
+                self._unread_versions = after
+    
+    def get_unread_count(self, username):
+        """Unread notifications for a user, served from the maintained counters"""
+        if st.session_state.data_manager.in_transaction():
+            # Buffered writes may still roll back, so this count is not cached
+            return len([n for n in self.get_user_notifications(username) if not n.get('read', False)])
+        versions = self._source_versions()
+        with self._unread_lock:
+            if versions != self._unread_versions:
+                self._unread_counts.clear()
+                self._unread_audiences.clear()
+                self._unread_versions = versions
+            if username in self._unread_counts:
+                return self._unread_counts[username]
+        
+        audiences = set(self.get_user_audiences(username))
+        count = len([n for n in self.get_user_notifications(username) if not n.get('read', False)])
+        with self._unread_lock:
+            if self._unread_versions == versions:
+                self._unread_counts[username] = count
+                self._unread_audiences[username] = audiences
+        return count
+    
+    def add_notifications(self, records):
+        """Write built notification rows (see build_notification/build_broadcast) in one write"""
+        if not records:
+            return False
+        with self._adjusting_unread() as adjustments:
+            return self._write_new(records, adjustments)
+    
+    def _write_new(self, records, adjustments):
+        if not st.session_state.data_manager.add_records('notifications', records):
+            return False
+        for record in records:
+            if record.get('audience'):
+                adjustments.append((None, record['audience'], 1))
+            else:
+                adjustments.append((record['username'], None, 1))
+        return True
+    
+    def _coalesce(self, notification_data, coalesced_title):
+        """Merge notification_data into the recipient's unread group with the same group_key
+        started within COALESCE_WINDOW_MINUTES, or write it as a new group when there is none"""
+        data_manager = st.session_state.data_manager
+        audience = notification_data.get('audience')
+        recipient = {'audience': audience} if audience else {'username': notification_data['username']}
+        since = (datetime.now() - timedelta(minutes=COALESCE_WINDOW_MINUTES)).strftime('%Y-%m-%d %H:%M:%S')
+        
+        with self._adjusting_unread() as adjustments:
+            latest = data_manager.query(
+                'notifications', where={**recipient, 'group_key': notification_data['group_key']},
+                between={'created_date': (since, None)}, order_by=['created_date', 'id'], ascending=False, limit=1
+            )
+            if latest.empty:
+                return self._write_new([notification_data], adjustments)
+            row = latest.to_dict('records')[0]
+            # A group someone has already read or dismissed starts over, so the merge shows as new
+            if audience:
+                seen = not data_manager.query(RECEIPTS_TABLE, where={'notification_id': row['id']}, limit=1).empty
+            else:
+                seen = row.get('read') == True
+            if seen:
+                return self._write_new([notification_data], adjustments)
             
-            # If target is "all", create notifications for all users
+            # Appending keeps a merge O(1); the group's row stays as it is and unread
+            current = self._with_merges([row])[0].get('count')
+            count = (1 if pd.isna(current) else int(current)) + 1
+            return data_manager.add_record(MERGES_TABLE, {
+                'notification_id': row['id'],
+                'title': coalesced_title.replace('{count}', str(count)),
+                'message': notification_data['message'],
+                'count': count,
+            })
+    
+    def _with_merges(self, notifications):
+        """notifications (dicts) with the title, message and count of their group's latest merge"""
+        grouped = [n['id'] for n in notifications if isinstance(n.get('group_key'), str) and n['group_key']]
+        if not grouped:
+            return notifications
+        merges = st.session_state.data_manager.query(
+            MERGES_TABLE, where={'notification_id': grouped}, columns=['id', 'notification_id', 'title', 'message', 'count']
+        )
+        if merges.empty:
+            return notifications
+        latest = merges.sort_values('id').drop_duplicates('notification_id', keep='last')
+        latest = latest.set_index(pd.to_numeric(latest['notification_id'])).to_dict('index')
+        for notification in notifications:
+            merge = latest.get(notification['id'])
+            if merge:
+                notification.update(title=merge['title'], message=merge['message'], count=int(merge['count']))
+        return notifications
+    
+    def add_notification(self, title, notification_type, target_user, message="",
+                         coalesce_key=None, coalesced_title=None):
+        """Add a new notification.
+        
+        With coalesce_key, a new notification for the same recipient and key
+        within COALESCE_WINDOW_MINUTES of the group's first one is merged into
+        that group instead: its count goes up, its title becomes
+        coalesced_title with '{count}' filled in, and its message is the
+        latest one.
+        """
+        try:
+            # "all" is stored once as a broadcast, not copied to every user
             if target_user == "all":
-                users_df = st.session_state.data_manager.load_csv('users')
-                if not users_df.empty:
-                    for _, user in users_df.iterrows():
-                        notification_data['username'] = user['username']
-                        st.session_state.data_manager.add_record('notifications', notification_data.copy())
-                    return True
+                notification_data = self.build_broadcast(title, notification_type, AUDIENCE_ALL, message)
             else:
-                return st.session_state.data_manager.add_record('notifications', notification_data)
+                notification_data = self.build_notification(title, notification_type, target_user, message)
+            
+            if coalesce_key is not None:
+                notification_data.update(group_key=coalesce_key, count=1)
+                return self._coalesce(notification_data, coalesced_title or title)
+            return self.add_notifications([notification_data])
             
         except Exception as e:
             st.error(f"알림 생성 중 오류가 발생했습니다: {e}")
             return False
     
+    def get_user_audiences(self, username):
+        """Broadcast audiences a user belongs to"""
+        user_rows = st.session_state.data_manager.query(
+            'users', where={'username': username}, columns=['role', 'club_name']
+        )
+        audiences = [AUDIENCE_ALL]
+        if not user_rows.empty:
+            audiences += [role_audience(role) for role in user_rows['role'].dropna().unique()]
+            audiences += [club_audience(club) for club in user_rows['club_name'].dropna().unique()]
+        return list(dict.fromkeys(audiences))
+    
     def get_user_notifications(self, username):
         """Get notifications for a specific user"""
         try:
-            notifications_df = st.session_state.data_manager.load_csv('notifications')
+            data_manager = st.session_state.data_manager
+            personal = data_manager.query('notifications', where={'username': username})
+            broadcasts = data_manager.query(
+                'notifications', where={'audience': self.get_user_audiences(username)}
+            )
             
-            if notifications_df.empty:
-                return []
+            if not broadcasts.empty:
+                receipts = data_manager.query(
+                    RECEIPTS_TABLE, where={'username': username}, columns=['notification_id', 'status']
+                )
+                dismissed = receipts[receipts['status'] == 'dismissed']['notification_id'] if not receipts.empty else []
+                broadcasts = broadcasts[~broadcasts['id'].isin(list(dismissed))].copy()
+                read_ids = receipts['notification_id'].tolist() if not receipts.empty else []
+                broadcasts['read'] = broadcasts['id'].isin(read_ids)
             
-            user_notifications = notifications_df[notifications_df['username'] == username]
-            user_notifications = user_notifications.sort_values('created_date', ascending=False)
+            frames = [df for df in (personal, broadcasts) if not df.empty]
+            if not frames:
+                return []
+            user_notifications = pd.concat(frames, ignore_index=True)
+            user_notifications = user_notifications.sort_values(['created_date', 'id'], ascending=False, kind='stable')
             
-            return user_notifications.to_dict('records')
+            return self._with_merges(user_notifications.to_dict('records'))
         except:
             return []
     
-    def mark_as_read(self, notification_id):
-        """Mark a notification as read"""
+    @staticmethod
+    def _feed_key(notification):
+        """Sort key of the feed (newest first) and the cursor format"""
+        return (str(notification['created_date']), int(notification['id']))
+    
+    def _fetch_older(self, where, cursor, limit):
+        """Up to limit notifications matching where that come after cursor in the feed, newest first"""
+        data_manager = st.session_state.data_manager
+        between = {'created_date': (None, cursor[0])} if cursor else None
+        fetch = limit
+        while True:
+            rows = data_manager.query(
+                'notifications', where=where, between=between,
+                order_by=['created_date', 'id'], ascending=False, limit=fetch
+            )
+            # between is inclusive, so rows sharing the cursor's timestamp may already have been shown
+            records = [r for r in rows.to_dict('records') if cursor is None or self._feed_key(r) < cursor]
+            if len(records) >= limit or len(rows) < fetch:
+                return records[:limit]
+            fetch += len(rows) - len(records)
+    
+    def get_notification_page(self, username, cursor=None, limit=NOTIFICATION_PAGE_SIZE, read=None):
+        """One page of a user's feed, newest first, as (notifications, next_cursor).
+        
+        cursor is the next_cursor of the previous page (None for the first page)
+        and next_cursor is None once the feed is exhausted. read=True/False keeps
+        only read/unread notifications. Each step reads at most limit personal
+        and limit broadcast rows, so a page costs the same however long the
+        history is.
+        """
         try:
-            return st.session_state.data_manager.update_record('notifications', notification_id, {'read': True})
+            data_manager = st.session_state.data_manager
+            audiences = self.get_user_audiences(username)
+            page = []
+            while True:
+                candidates = (
+                    self._fetch_older({'username': username}, cursor, limit)
+                    + self._fetch_older({'audience': audiences}, cursor, limit)
+                )
+                candidates.sort(key=self._feed_key, reverse=True)
+                batch = candidates[:limit]
+                
+                broadcast_ids = [n['id'] for n in batch if self._is_broadcast(n)]
+                receipts = {}
+                if broadcast_ids:
+                    rows = data_manager.query(
+                        RECEIPTS_TABLE, where={'username': username, 'notification_id': broadcast_ids},
+                        columns=['notification_id', 'status']
+                    )
+                    receipts = dict(zip(rows['notification_id'], rows['status'])) if not rows.empty else {}
+                
+                for notification in batch:
+                    cursor = self._feed_key(notification)
+                    if self._is_broadcast(notification):
+                        if receipts.get(notification['id']) == 'dismissed':
+                            continue
+                        notification['read'] = notification['id'] in receipts
+                    if read is not None and bool(notification.get('read', False)) != read:
+                        continue
+                    page.append(notification)
+                    if len(page) == limit:
+                        return self._with_merges(page), cursor
+                
+                if len(batch) < limit:
+                    return self._with_merges(page), None
+        except:
+            return [], None
+    
+    def _get_notification(self, notification_id):
+        rows = st.session_state.data_manager.query(
+            'notifications', where={'id': notification_id}, columns=['username', 'read', 'audience']
+        )
+        return rows.to_dict('records')[0] if not rows.empty else {}
+    
+    @staticmethod
+    def _is_broadcast(notification):
+        return isinstance(notification.get('audience'), str) and bool(notification['audience'])
+    
+    def _save_receipts(self, username, notification_ids, status):
+        """Record read/dismissed receipts for broadcasts, one row per user and notification.
+        
+        Returns how many of the broadcasts had no receipt yet, i.e. were unread.
+        """
+        data_manager = st.session_state.data_manager
+        existing = data_manager.query(
+            RECEIPTS_TABLE, where={'username': username, 'notification_id': list(notification_ids)}
+        )
+        known = dict(zip(existing['notification_id'], existing['id'])) if not existing.empty else {}
+        
+        new_receipts = [
+            {'notification_id': notification_id, 'username': username, 'status': status}
+            for notification_id in notification_ids if notification_id not in known
+        ]
+        with data_manager.transaction():
+            data_manager.add_records(RECEIPTS_TABLE, new_receipts)
+            if status == 'dismissed' and known:
+                data_manager.update_records(RECEIPTS_TABLE, {receipt_id: {'status': status} for receipt_id in known.values()})
+        return len(new_receipts)
+    
+    def mark_as_read(self, notification_id, username=None):
+        """Mark a notification as read (for username, when it is a broadcast)"""
+        try:
+            with self._adjusting_unread() as adjustments:
+                notification = self._get_notification(notification_id)
+                if not notification:
+                    return False
+                if self._is_broadcast(notification):
+                    if username is None:
+                        return False
+                    adjustments.append((username, None, -self._save_receipts(username, [notification_id], 'read')))
+                    return True
+                if not st.session_state.data_manager.update_record('notifications', notification_id, {'read': True}):
+                    return False
+                if not notification.get('read', False):
+                    adjustments.append((notification['username'], None, -1))
+                return True
         except Exception as e:
             st.error(f"알림 읽음 처리 중 오류가 발생했습니다: {e}")
             return False
@@ -59,26 +400,41 @@ class NotificationSystem:
     def mark_all_as_read(self, username):
         """Mark all notifications as read for a user"""
         try:
-            notifications_df = st.session_state.data_manager.load_csv('notifications')
-            user_notifications = notifications_df[
-                (notifications_df['username'] == username) & 
-                (notifications_df['read'] == False)
-            ]
-            
-            success_count = 0
-            for _, notification in user_notifications.iterrows():
-                if self.mark_as_read(notification['id']):
-                    success_count += 1
-            
-            return success_count > 0
+            with self._adjusting_unread() as adjustments:
+                notifications = [n for n in self.get_user_notifications(username) if not n.get('read', False)]
+                if not notifications:
+                    return False
+                
+                broadcast_ids = [n['id'] for n in notifications if self._is_broadcast(n)]
+                updates = {n['id']: {'read': True} for n in notifications if n['id'] not in broadcast_ids}
+                
+                if updates:
+                    st.session_state.data_manager.update_records('notifications', updates)
+                if broadcast_ids:
+                    self._save_receipts(username, broadcast_ids, 'read')
+                adjustments.append((username, None, -len(notifications)))
+                return True
         except Exception as e:
             st.error(f"전체 알림 읽음 처리 중 오류가 발생했습니다: {e}")
             return False
     
-    def delete_notification(self, notification_id):
-        """Delete a notification"""
+    def delete_notification(self, notification_id, username=None):
+        """Delete a notification (a broadcast is only hidden for username)"""
         try:
-            return st.session_state.data_manager.delete_record('notifications', notification_id)
+            with self._adjusting_unread() as adjustments:
+                notification = self._get_notification(notification_id)
+                if not notification:
+                    return False
+                if self._is_broadcast(notification):
+                    if username is None:
+                        return False
+                    adjustments.append((username, None, -self._save_receipts(username, [notification_id], 'dismissed')))
+                    return True
+                if not st.session_state.data_manager.delete_record('notifications', notification_id):
+                    return False
+                if not notification.get('read', False):
+                    adjustments.append((notification['username'], None, -1))
+                return True
         except Exception as e:
             st.error(f"알림 삭제 중 오류가 발생했습니다: {e}")
             return False
@@ -87,42 +443,55 @@ class NotificationSystem:
         """Display the notification interface"""
         st.markdown("### 🔔 알림")
         
-        # Get user notifications
-        notifications = self.get_user_notifications(user['username'])
-        
-        if not notifications:
-            st.info("새로운 알림이 없습니다.")
-            return
-        
+        self.show_notification_list(user)
+    
+    @st.fragment
+    def show_notification_list(self, user):
+        """Notification actions and cards; reruns on its own when used"""
         # Quick actions
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            unread_count = len([n for n in notifications if not n.get('read', False)])
+            unread_count = self.get_unread_count(user['username'])
             st.metric("읽지 않은 알림", unread_count)
         
         with col2:
             if st.button("📧 모두 읽음", use_container_width=True):
                 if self.mark_all_as_read(user['username']):
                     st.success("모든 알림을 읽음 처리했습니다.")
-                    st.rerun()
+                    rerun_fragment()
         
         with col3:
             # Filter options
             filter_type = st.selectbox("🔍 필터", ["전체", "읽지 않음", "읽음"])
         
-        # Filter notifications
-        filtered_notifications = notifications
-        if filter_type == "읽지 않음":
-            filtered_notifications = [n for n in notifications if not n.get('read', False)]
-        elif filter_type == "읽음":
-            filtered_notifications = [n for n in notifications if n.get('read', False)]
+        read_filter = {"전체": None, "읽지 않음": False, "읽음": True}[filter_type]
         
-        # Display notifications
+        # Pages loaded so far; a new filter starts over at one page
+        feed = st.session_state.get('notification_feed')
+        if not feed or feed['filter'] != filter_type:
+            feed = {'filter': filter_type, 'pages': 1}
+            st.session_state.notification_feed = feed
+        
+        # Display notifications, each page continuing from the previous page's cursor
         st.markdown("---")
         
-        for notification in filtered_notifications:
-            self.show_notification_card(notification, user)
+        cursor = None
+        shown = 0
+        for _ in range(feed['pages']):
+            notifications, cursor = self.get_notification_page(user['username'], cursor, read=read_filter)
+            for notification in notifications:
+                self.show_notification_card(notification, user)
+            shown += len(notifications)
+            if cursor is None:
+                break
+        
+        if shown == 0:
+            st.info("새로운 알림이 없습니다.")
+        elif cursor is not None:
+            if st.button("⬇️ 더 보기", use_container_width=True):
+                feed['pages'] += 1
+                rerun_fragment()
     
     def show_notification_card(self, notification, user):
         """Display a single notification card"""
@@ -200,100 +569,258 @@ class NotificationSystem:
             with col1:
                 if not read_status:
                     if st.button("📖", key=f"read_{notification['id']}", help="읽음 처리"):
-                        if self.mark_as_read(notification['id']):
-                            st.rerun()
+                        if self.mark_as_read(notification['id'], user['username']):
+                            rerun_fragment()
             
             with col2:
                 if st.button("🗑️", key=f"delete_{notification['id']}", help="삭제"):
-                    if self.delete_notification(notification['id']):
+                    if self.delete_notification(notification['id'], user['username']):
                         st.success("알림이 삭제되었습니다.")
-                        st.rerun()
+                        rerun_fragment()
     
     def send_system_notification(self, title, message, notification_type="info", target_users=None):
         """Send system-wide notification"""
         try:
             if target_users is None:
-                # Send to all users
-                users_df = st.session_state.data_manager.load_csv('users')
-                target_users = users_df['username'].tolist() if not users_df.empty else []
+                # Send to all users as one broadcast row
+                return self.send_audience_notification(AUDIENCE_ALL, title, message, notification_type)
             
-            success_count = 0
-            for username in target_users:
-                if self.add_notification(title, notification_type, username, message):
-                    success_count += 1
+            created_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            records = [
+                self.build_notification(title, notification_type, username, message, created_date)
+                for username in target_users
+            ]
             
-            return success_count > 0
+            return self.add_notifications(records)
         except Exception as e:
             st.error(f"시스템 알림 발송 중 오류가 발생했습니다: {e}")
             return False
     
-    def send_club_notification(self, club_name, title, message, notification_type="info"):
-        """Send notification to specific club members"""
+    def send_audience_notification(self, audience, title, message, notification_type="info"):
+        """Send one broadcast notification to an audience (see club_audience/role_audience)"""
         try:
-            users_df = st.session_state.data_manager.load_csv('users')
-            
-            if club_name == "전체":
-                club_users = users_df['username'].tolist()
-            else:
-                club_users = users_df[users_df['club_name'] == club_name]['username'].tolist()
-            
-            return self.send_system_notification(title, message, notification_type, club_users)
+            return self.add_notifications([self.build_broadcast(title, notification_type, audience, message)])
         except Exception as e:
-            st.error(f"동아리 알림 발송 중 오류가 발생했습니다: {e}")
+            st.error(f"알림 발송 중 오류가 발생했습니다: {e}")
             return False
     
-    def check_assignment_deadlines(self):
-        """Check for assignment deadlines and send notifications"""
-        try:
-            assignments_df = st.session_state.data_manager.load_csv('assignments')
-            
-            if assignments_df.empty:
-                return
+    def send_club_notification(self, club_name, title, message, notification_type="info"):
+        """Send notification to specific club members"""
+        return self.send_audience_notification(club_audience(club_name), title, message, notification_type)
+    
+    def send_role_notification(self, role, title, message, notification_type="info"):
+        """Send notification to every user with a role"""
+        return self.send_audience_notification(role_audience(role), title, message, notification_type)
+    
+    def collect_due_reminders(self, data_manager, now=None, kinds=REMINDER_KINDS):
+        """Reminder broadcasts for assignments due and schedules happening tomorrow.
+        
+        Each row carries a reminder_key ('<kind>:<id>:<day>') identifying the
+        reminder, so the same one is never written twice.
+        """
+        now = now or datetime.now()
+        tomorrow = now + timedelta(days=1)
+        day = tomorrow.strftime('%Y-%m-%d')
+        created_date = now.strftime('%Y-%m-%d %H:%M:%S')
+        reminders = []
+        
+        if 'assignment' in kinds:
+            due_tomorrow = data_manager.query(
+                'assignments', where={'status': '활성'}, columns=['id', 'title', 'club'],
+                between={'due_date': (day, f"{day} 23:59:59")}
+            )
+            for assignment in due_tomorrow.to_dict('records'):
+                title = f"⏰ 과제 마감 임박: {assignment['title']}"
+                message = f"내일({tomorrow.strftime('%m월 %d일')}) 마감되는 과제가 있습니다. 서둘러 제출해주세요!"
+                reminders.append(dict(
+                    self.build_broadcast(title, "warning", club_audience(assignment['club']), message, created_date),
+                    reminder_key=f"assignment:{assignment['id']}:{day}"
+                ))
+        
+        if 'schedule' in kinds:
+            tomorrow_schedules = data_manager.query(
+                'schedule', columns=['id', 'title', 'club', 'time', 'location'],
+                between={'date': (day, f"{day} 23:59:59")}
+            )
+            for schedule in tomorrow_schedules.to_dict('records'):
+                title = f"📅 내일 일정 알림: {schedule['title']}"
+                message = f"내일({tomorrow.strftime('%m월 %d일')}) {schedule['time']}에 '{schedule['title']}' 일정이 있습니다.\n장소: {schedule['location']}"
+                reminders.append(dict(
+                    self.build_broadcast(title, "info", club_audience(schedule['club']), message, created_date),
+                    reminder_key=f"schedule:{schedule['id']}:{day}"
+                ))
+        
+        return reminders
+    
+    def send_due_reminders(self, data_manager=None, now=None, kinds=REMINDER_KINDS):
+        """Write every due reminder not sent yet in one batch; returns how many were written.
+        
+        Safe to repeat and to run from several processes at once: the sent
+        check and the write happen under the notifications write lock. Takes
+        the data layer explicitly so reminder_scheduler can call it outside a
+        Streamlit session.
+        """
+        data_manager = data_manager or st.session_state.data_manager
+        with data_manager.storage.locked('notifications'):
+            reminders = self.collect_due_reminders(data_manager, now, kinds)
+            if not reminders:
+                return 0
             
-            now = datetime.now()
-            tomorrow = now + timedelta(days=1)
+            sent = data_manager.query(
+                'notifications', where={'reminder_key': [r['reminder_key'] for r in reminders]},
+                columns=['reminder_key']
+            )
+            sent_keys = set(sent['reminder_key']) if not sent.empty else set()
+            new_reminders = [r for r in reminders if r['reminder_key'] not in sent_keys]
             
-            # Check assignments due tomorrow
-            assignments_df['due_date'] = pd.to_datetime(assignments_df['due_date'])
-            due_tomorrow = assignments_df[
-                (assignments_df['due_date'].dt.date == tomorrow.date()) &
-                (assignments_df['status'] == '활성')
-            ]
+            if new_reminders and not data_manager.add_records('notifications', new_reminders):
+                return 0
+            return len(new_reminders)
+    
+    def _archive_notifications(self, data_manager, rows, created):
+        """Append rows to data/archive/notifications-<YYYY-MM>.csv.gz by month of created_date"""
+        archive_dir = os.path.join(data_manager.data_dir, NOTIFICATION_ARCHIVE_DIR)
+        os.makedirs(archive_dir, exist_ok=True)
+        rows = rows.reindex(columns=TABLE_SCHEMAS['notifications'])
+        for month, month_rows in rows.groupby(created.loc[rows.index].dt.strftime('%Y-%m')):
+            path = os.path.join(archive_dir, f'notifications-{month}.csv.gz')
+            header = not os.path.exists(path)
+            # Each append is its own gzip member; gzip and read_csv read them back as one file
+            with gzip.open(path, 'at', encoding='utf-8', newline='') as f:
+                month_rows.to_csv(f, index=False, header=header)
+    
+    def _read_by_audience(self, data_manager, broadcasts, receipts_df):
+        """For each broadcast row, whether every user in its audience has a receipt for it"""
+        members = {}
+        for user in data_manager.load_csv('users').to_dict('records'):
+            audiences = {AUDIENCE_ALL}
+            if pd.notna(user.get('role')):
+                audiences.add(role_audience(user['role']))
+            if pd.notna(user.get('club_name')):
+                audiences.add(club_audience(user['club_name']))
+            for audience in audiences:
+                members.setdefault(audience, set()).add(user['username'])
+        
+        seen = {}
+        if not receipts_df.empty:
+            seen = receipts_df.groupby('notification_id')['username'].agg(set).to_dict()
+        return pd.Series(
+            [members.get(audience, set()) <= seen.get(notification_id, set())
+             for notification_id, audience in zip(broadcasts['id'], broadcasts['audience'])],
+            index=broadcasts.index,
+        )
+    
+    def compact_notifications(self, data_manager=None, now=None):
+        """Apply the retention policy to the notifications table; returns a report dict.
+        
+        Folds coalesced merges into their group's row, drops rows past
+        their type's TTL and personal rows beyond each user's
+        newest NOTIFICATION_KEEP_PER_USER (read ones only, except for
+        NOTIFICATION_EXPIRE_UNREAD_TYPES or when NOTIFICATION_EXPIRE_UNREAD is
+        set), moves read personal rows older than
+        NOTIFICATION_ARCHIVE_AFTER_DAYS to the archive, and removes receipts
+        of broadcasts that are gone. The report has row counts and table sizes
+        in bytes before and after.
+        """
+        data_manager = data_manager or st.session_state.data_manager
+        now = now or datetime.now()
+        with data_manager.storage.locked('notifications', RECEIPTS_TABLE, MERGES_TABLE):
+            notifications_df = data_manager.load_csv('notifications')
+            receipts_df = data_manager.load_csv(RECEIPTS_TABLE)
+            merges_df = data_manager.load_csv(MERGES_TABLE)
+            report = {
+                'rows_before': len(notifications_df),
+                'bytes_before': data_manager.table_size('notifications'),
+                'merged': len(merges_df), 'expired': 0, 'trimmed': 0, 'archived': 0, 'receipts_removed': 0,
+            }
             
-            for _, assignment in due_tomorrow.iterrows():
-                title = f"⏰ 과제 마감 임박: {assignment['title']}"
-                message = f"내일({tomorrow.strftime('%m월 %d일')}) 마감되는 과제가 있습니다. 서둘러 제출해주세요!"
+            if not notifications_df.empty:
+                if not merges_df.empty:
+                    # The latest merge of each group carries its current title, message and count
+                    latest = merges_df.sort_values('id').drop_duplicates('notification_id', keep='last')
+                    latest = latest.set_index(pd.to_numeric(latest['notification_id']))
+                    merged = notifications_df['id'].isin(latest.index)
+                    for column in ('title', 'message', 'count'):
+                        folded = notifications_df.loc[merged, 'id'].map(latest[column])
+                        if column == 'count':
+                            folded = pd.to_numeric(folded)
+                        notifications_df.loc[merged, column] = folded
+                
+                created = pd.to_datetime(notifications_df['created_date'], errors='coerce')
+                age_days = (now - created).dt.days
+                ttl_days = notifications_df['type'].map(NOTIFICATION_TTL_DAYS).fillna(DEFAULT_NOTIFICATION_TTL_DAYS)
+                
+                broadcast = pd.Series(False, index=notifications_df.index)
+                if 'audience' in notifications_df.columns:
+                    broadcast = notifications_df['audience'].fillna('') != ''
+                
+                read = notifications_df['read'] == True
+                if broadcast.any():
+                    read_by_all = self._read_by_audience(data_manager, notifications_df[broadcast], receipts_df)
+                    read |= read_by_all.reindex(read.index, fill_value=False).astype(bool)
+                removable = read | notifications_df['type'].isin(NOTIFICATION_EXPIRE_UNREAD_TYPES) | NOTIFICATION_EXPIRE_UNREAD
+                
+                expired = (age_days > ttl_days) & removable
+                personal = ~broadcast & ~expired
+                
+                # Newest first per user; everything past the first N is trimmed
+                ranked = notifications_df[personal].assign(_created=created[personal])
+                ranked = ranked.sort_values(['_created', 'id'], ascending=False)
+                rank = ranked.groupby('username').cumcount()
+                trimmed = pd.Series(False, index=notifications_df.index)
+                trimmed.loc[rank.index[rank >= NOTIFICATION_KEEP_PER_USER]] = True
+                trimmed &= removable
+                
+                archived = (
+                    personal & ~trimmed & (notifications_df['read'] == True)
+                    & (age_days > NOTIFICATION_ARCHIVE_AFTER_DAYS)
+                )
+                keep = ~(expired | trimmed | archived)
+                
+                if archived.any():
+                    self._archive_notifications(data_manager, notifications_df[archived], created)
                 
-                self.send_club_notification(assignment['club'], title, message, "warning")
+                kept_df = notifications_df[keep]
+                kept_receipts = receipts_df
+                if not receipts_df.empty:
+                    kept_receipts = receipts_df[receipts_df['notification_id'].isin(kept_df['id'])]
+                
+                report.update(
+                    expired=int(expired.sum()), trimmed=int(trimmed.sum()), archived=int(archived.sum()),
+                    receipts_removed=len(receipts_df) - len(kept_receipts),
+                )
+                
+                if len(kept_df) < len(notifications_df) or report['merged'] or report['receipts_removed']:
+                    with data_manager.transaction():
+                        data_manager.save_csv('notifications', kept_df)
+                        if report['receipts_removed']:
+                            data_manager.save_csv(RECEIPTS_TABLE, kept_receipts)
+                        if report['merged']:
+                            data_manager.save_csv(MERGES_TABLE, merges_df.iloc[0:0])
+            elif not merges_df.empty:
+                data_manager.save_csv(MERGES_TABLE, merges_df.iloc[0:0])
             
+            report['rows_after'] = (
+                len(notifications_df) - report['expired'] - report['trimmed'] - report['archived']
+            )
+            report['bytes_after'] = data_manager.table_size('notifications')
+        return report
+    
+    def check_assignment_deadlines(self):
+        """Check for assignment deadlines and send notifications"""
+        try:
+            return self.send_due_reminders(kinds=('assignment',))
         except Exception as e:
             st.error(f"과제 마감일 확인 중 오류가 발생했습니다: {e}")
+            return 0
     
     def check_schedule_reminders(self):
         """Check for upcoming schedules and send reminders"""
         try:
-            schedule_df = st.session_state.data_manager.load_csv('schedule')
-            
-            if schedule_df.empty:
-                return
-            
-            now = datetime.now()
-            tomorrow = now + timedelta(days=1)
-            
-            # Check schedules for tomorrow
-            schedule_df['date'] = pd.to_datetime(schedule_df['date'])
-            tomorrow_schedules = schedule_df[
-                schedule_df['date'].dt.date == tomorrow.date()
-            ]
-            
-            for _, schedule in tomorrow_schedules.iterrows():
-                title = f"📅 내일 일정 알림: {schedule['title']}"
-                message = f"내일({tomorrow.strftime('%m월 %d일')}) {schedule['time']}에 '{schedule['title']}' 일정이 있습니다.\n장소: {schedule['location']}"
-                
-                self.send_club_notification(schedule['club'], title, message, "info")
-            
+            return self.send_due_reminders(kinds=('schedule',))
         except Exception as e:
             st.error(f"일정 알림 확인 중 오류가 발생했습니다: {e}")
+            return 0
     
     def get_notification_statistics(self, user):
         """Get notification statistics for admin"""
@@ -303,9 +830,12 @@ class NotificationSystem:
             if notifications_df.empty:
                 return {}
             
-            # Overall stats
+            # Overall stats (broadcast read state lives in receipts, so unread counts personal rows)
             total_notifications = len(notifications_df)
-            unread_notifications = len(notifications_df[notifications_df['read'] == False])
+            personal_df = notifications_df
+            if 'audience' in notifications_df.columns:
+                personal_df = notifications_df[notifications_df['audience'].fillna('') == '']
+            unread_notifications = len(personal_df[personal_df['read'] == False])
             
             # By type
             type_counts = notifications_df['type'].value_counts().to_dict()
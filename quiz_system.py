@@ -2,8 +2,6 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime, date, timedelta
 import json
-import plotly.express as px
-import plotly.graph_objects as go
 from collections import Counter
 import random
 
@@ -13,29 +11,6 @@ class QuizSystem:
     def __init__(self):
         self.quizzes_file = 'data/quizzes.csv'
         self.quiz_responses_file = 'data/quiz_responses.csv'
-        self.initialize_quiz_files()
-
-    def initialize_quiz_files(self):
-        """Initialize quiz-related CSV files"""
-        # Initialize quizzes.csv
-        if not st.session_state.data_manager.load_csv(
-                'quizzes').empty is False:
-            quizzes_structure = [
-                'id', 'title', 'description', 'club', 'creator', 'questions',
-                'time_limit', 'attempts_allowed', 'status', 'created_date'
-            ]
-            empty_df = pd.DataFrame(columns=quizzes_structure)
-            st.session_state.data_manager.save_csv('quizzes', empty_df)
-
-        # Initialize quiz_responses.csv
-        if not st.session_state.data_manager.load_csv(
-                'quiz_responses').empty is False:
-            responses_structure = [
-                'id', 'quiz_id', 'username', 'answers', 'score',
-                'total_questions', 'completed_date', 'time_taken'
-            ]
-            empty_df = pd.DataFrame(columns=responses_structure)
-            st.session_state.data_manager.save_csv('quiz_responses', empty_df)
 
     def show_quiz_interface(self, user):
         """Display the quiz interface"""
@@ -388,13 +363,13 @@ class QuizSystem:
                     'time_taken': round(time_taken, 2)
                 }
 
-                if st.session_state.data_manager.add_record(
-                        'quiz_responses', response_data):
-                    st.success(f"퀴즈가 완료되었습니다! 점수: {score}/{len(questions)}점")
-                    st.session_state[f'taking_quiz_{quiz["id"]}'] = False
+                # Response and badge land together or not at all
+                with st.session_state.data_manager.transaction():
+                    submitted = st.session_state.data_manager.add_record(
+                        'quiz_responses', response_data)
 
                     # Award badge for perfect score
-                    if score == len(questions):
+                    if submitted and score == len(questions):
                         badge_data = {
                             'username':
                             user['username'],
@@ -412,6 +387,9 @@ class QuizSystem:
                         st.session_state.data_manager.add_record(
                             'badges', badge_data)
 
+                if submitted:
+                    st.success(f"퀴즈가 완료되었습니다! 점수: {score}/{len(questions)}점")
+                    st.session_state[f'taking_quiz_{quiz["id"]}'] = False
                     st.rerun()
                 else:
                     st.error("퀴즈 제출에 실패했습니다.")
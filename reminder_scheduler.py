@@ -0,0 +1,136 @@
+"""Background runner for the notification jobs.
+
+get_shared_systems() in app.py starts one ReminderScheduler thread per
+server process, which calls NotificationSystem.send_due_reminders() every
+CLUBSYSTEM_REMINDER_INTERVAL seconds (default 900) and
+NotificationSystem.compact_notifications() plus ChatSystem.compact_messages()
+every CLUBSYSTEM_COMPACTION_INTERVAL seconds (default one day, the first
+run one interval after start). The jobs are
+idempotent, so several server processes can each run one. Set the reminder
+interval to 0 to keep the jobs out of the server and run them from a
+separate worker instead:
+
+    python reminder_scheduler.py [--once] [--compact] [--interval SECONDS]
+"""
+import argparse
+import logging
+import os
+import threading
+import time
+
+REMINDER_INTERVAL = int(os.environ.get('CLUBSYSTEM_REMINDER_INTERVAL', '900'))
+COMPACTION_INTERVAL = int(os.environ.get('CLUBSYSTEM_COMPACTION_INTERVAL', '86400'))
+
+logger = logging.getLogger(__name__)
+
+
+class ReminderScheduler(threading.Thread):
+    """Daemon thread running the reminder checks and notification/chat compaction on a timer"""
+
+    def __init__(self, data_manager, notification_system, interval=REMINDER_INTERVAL,
+                 compaction_interval=COMPACTION_INTERVAL, chat_system=None):
+        super().__init__(name='reminder-scheduler', daemon=True)
+        self.data_manager = data_manager
+        self.notification_system = notification_system
+        self.chat_system = chat_system
+        self.interval = interval
+        self.compaction_interval = compaction_interval
+        # The first compaction waits a full interval, so starting a server never prunes data right away
+        self._next_compaction = time.monotonic() + compaction_interval
+        self._stopped = threading.Event()
+
+    def run_once(self):
+        """One check; returns how many reminders were written"""
+        try:
+            sent = self.notification_system.send_due_reminders(self.data_manager)
+        except Exception:
+            logger.exception('reminder run failed')
+            return 0
+        if sent:
+            logger.info('sent %d reminders', sent)
+        return sent
+
+    def compact(self):
+        """One retention pass over the notifications; returns its report (None on failure)"""
+        try:
+            report = self.notification_system.compact_notifications(self.data_manager)
+        except Exception:
+            logger.exception('notification compaction failed')
+            return None
+        logger.info(
+            'notifications compacted: %(rows_before)s -> %(rows_after)s rows, '
+            '%(bytes_before)s -> %(bytes_after)s bytes (%(merged)s merges folded, %(expired)s expired, '
+            '%(trimmed)s trimmed, %(archived)s archived)', report
+        )
+        return report
+
+    def compact_chat(self):
+        """One tombstone compaction over the chat segments; returns its report (None on failure)"""
+        try:
+            report = self.chat_system.compact_messages(self.data_manager)
+        except Exception:
+            logger.exception('chat compaction failed')
+            return None
+        logger.info(
+            'chat compacted: %(rows_before)s -> %(rows_after)s rows in %(segments)s rooms, '
+            '%(bytes_before)s -> %(bytes_after)s bytes (%(archived)s archived, '
+            '%(tombstones_left)s tombstones in grace period)', report
+        )
+        return report
+
+    def run(self):
+        while not self._stopped.is_set():
+            self.run_once()
+            if self.compaction_interval > 0 and time.monotonic() >= self._next_compaction:
+                self.compact()
+                if self.chat_system is not None:
+                    self.compact_chat()
+                self._next_compaction = time.monotonic() + self.compaction_interval
+            self._stopped.wait(self.interval)
+
+    def stop(self):
+        self._stopped.set()
+
+
+def start_reminder_scheduler(data_manager, notification_system, interval=REMINDER_INTERVAL, chat_system=None):
+    """Start the scheduler thread, unless interval is 0 (reminders run by an external worker)"""
+    if interval <= 0:
+        return None
+    scheduler = ReminderScheduler(data_manager, notification_system, interval, chat_system=chat_system)
+    scheduler.start()
+    return scheduler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Send due assignment and schedule reminders')
+    parser.add_argument('--once', action='store_true', help='run a single check and exit')
+    parser.add_argument('--compact', action='store_true',
+                        help='run a single notification and chat compaction and exit')
+    parser.add_argument('--interval', type=int, default=REMINDER_INTERVAL or 900,
+                        help='seconds between checks')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+
+    # Imported here so the server only pays for them through app.py
+    from chat_system import ChatSystem
+    from data_manager import DataManager
+    from notification_system import NotificationSystem
+
+    scheduler = ReminderScheduler(DataManager(), NotificationSystem(), args.interval, chat_system=ChatSystem())
+    if args.compact:
+        report = scheduler.compact()
+        chat_report = scheduler.compact_chat()
+        if report is None or chat_report is None:
+            raise SystemExit(1)
+        for key, value in report.items():
+            print(f'notifications {key}: {value}')
+        for key, value in chat_report.items():
+            print(f'chat {key}: {value}')
+    elif args.once:
+        print(f'{scheduler.run_once()} reminders sent')
+    else:
+        scheduler.run()
+
+
+if __name__ == '__main__':
+    main()
@@ -2,15 +2,6 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime, date, timedelta
 import io
-from docx import Document
-from docx.shared import Inches
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.shared import RGBColor
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-from reportlab.lib.units import inch
 
 class ReportGenerator:
     def __init__(self):
@@ -149,6 +140,10 @@ class ReportGenerator:
                 )
 
     def create_professional_docx_report(self, data):
+        # python-docx is only needed for this export, so it loads on first use
+        from docx import Document
+        from docx.enum.text import WD_ALIGN_PARAGRAPH
+
         try:
             doc = Document()
 
@@ -219,6 +214,13 @@ class ReportGenerator:
             return None
 
     def create_professional_pdf_report(self, data):
+        # reportlab is only needed for this export, so it loads on first use
+        from reportlab.lib.pagesizes import A4
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib import colors
+        from reportlab.lib.units import inch
+
         try:
             buffer = io.BytesIO()
             doc = SimpleDocTemplate(buffer, pagesize=A4)
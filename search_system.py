@@ -185,23 +185,17 @@ class SearchSystem:
     def search_chats(self, query, club_filter, date_filter_start, user):
         """Search in chat logs"""
         try:
-            chat_df = st.session_state.data_manager.load_csv('chat_logs')
-            
-            if chat_df.empty:
-                return []
-            
-            # Filter non-deleted messages
-            chat_df = chat_df[chat_df['deleted'] != True]
-            
-            # Apply filters
-            if club_filter != "전체":
-                chat_df = chat_df[chat_df['club'] == club_filter]
-            
-            # Filter by user's accessible clubs if not teacher
+            # Read only the rooms searched (and, for students, the ones they belong to)
+            rooms = None if club_filter == "전체" else [club_filter]
             if user['role'] != '선생님':
                 user_clubs = st.session_state.data_manager.get_user_clubs(user['username'])
                 user_club_names = ["전체"] + user_clubs['club_name'].tolist()
-                chat_df = chat_df[chat_df['club'].isin(user_club_names)]
+                rooms = [room for room in (rooms or user_club_names) if room in user_club_names]
+            
+            chat_df = st.session_state.chat_system.load_messages(rooms)
+            
+            if chat_df.empty:
+                return []
             
             # Date filter
             if date_filter_start:
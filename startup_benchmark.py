@@ -0,0 +1,76 @@
+"""Startup-time benchmark: seconds until app.py has rendered the login page.
+
+Every run starts a fresh Python process, so module imports, the shared
+subsystem cache and the schema bootstrap are all cold, and executes app.py
+once through Streamlit's AppTest harness. Only the script run is timed;
+importing Streamlit itself is excluded because the server has already done
+that before the first browser connects.
+
+    python startup_benchmark.py [--runs N] [--fresh-data]
+
+By default each run works on a copy of ./data. --fresh-data starts from an
+empty data directory instead, which also times the first-install bootstrap.
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Runs in the child process and prints the seconds app.py took to render
+CHILD_SCRIPT = r'''
+import sys
+import time
+from streamlit.testing.v1 import AppTest
+
+app = AppTest.from_file(sys.argv[1], default_timeout=120)
+start = time.perf_counter()
+app.run()
+elapsed = time.perf_counter() - start
+
+if app.exception:
+    sys.exit(f"app.py raised: {app.exception[0].value}")
+if not any(widget.label == "👤 사용자명" for widget in app.text_input):
+    sys.exit("the login page was not rendered")
+print(elapsed)
+'''
+
+
+def run_once(fresh_data):
+    """Time one cold start in a scratch working directory"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        source = os.path.join(APP_DIR, 'data')
+        if not fresh_data and os.path.isdir(source):
+            shutil.copytree(source, os.path.join(work_dir, 'data'))
+
+        result = subprocess.run(
+            [sys.executable, '-c', CHILD_SCRIPT, os.path.join(APP_DIR, 'app.py')],
+            cwd=work_dir, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1])
+        return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='number of cold starts to time')
+    parser.add_argument('--fresh-data', action='store_true', help='start from an empty data directory')
+    args = parser.parse_args()
+
+    timings = []
+    for run in range(1, args.runs + 1):
+        seconds = run_once(args.fresh_data)
+        timings.append(seconds)
+        print(f'run {run}: {seconds:.3f}s')
+
+    print(f'login page rendered in {statistics.median(timings):.3f}s median, '
+          f'{min(timings):.3f}s best over {len(timings)} cold starts')
+
+
+if __name__ == '__main__':
+    main()
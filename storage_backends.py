@@ -0,0 +1,1120 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import io
+import csv
+import sqlite3
+import threading
+from contextlib import ExitStack, contextmanager
+from datetime import date, datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to the in-process lock only
+    fcntl = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Only the 'columnar' engine needs pyarrow
+    pa = pq = None
+
+# Parsed CSV tables shared by every CSVStorage in the process.
+# (filepath, projected columns or None) -> (version, DataFrame, row indexes)
+# Row indexes map column -> {value: row positions} and only live on full-table entries.
+_TABLE_CACHE = {}
+_TABLE_CACHE_LOCK = threading.Lock()
+
+# In-process half of file_lock(): one lock per lock file, plus the lock
+# files the current thread already holds so nested acquisitions pass through.
+_THREAD_LOCKS = {}
+_THREAD_LOCKS_GUARD = threading.Lock()
+_HELD_LOCKS = threading.local()
+
+# Row identity used when merging concurrent writes, first match wins
+MERGE_KEYS = ['id', 'username', 'name']
+
+# CSV columns that get a hash index (value -> row positions) the first time they are queried
+HASH_INDEXED_COLUMNS = ['username', 'club', 'date', 'audience']
+
+# Columns that get a SQLite index whenever a table has them
+INDEXED_COLUMNS = ['id', 'username', 'club', 'date', 'created_date', 'timestamp', 'audience', 'reminder_key', 'group_key', 'notification_id']
+
+# SQLite table holding the per-table write counters
+VERSIONS_TABLE = '__table_versions'
+
+# Tables split into one table per key (e.g. chat_logs__<room>) are named
+# <base table><PARTITION_SEPARATOR><partition> and stored like the base table
+PARTITION_SEPARATOR = '__'
+
+# Append-heavy history tables the 'columnar' engine keeps as Parquet,
+# mapped to the column their row groups are usually pruned on
+COLUMNAR_TABLES = {'attendance': 'date', 'notifications': 'created_date', 'chat_logs': 'timestamp'}
+PARQUET_ROW_GROUP_SIZE = 5000
+# Appends add small part files; this many trigger a compaction into one file
+PARQUET_MAX_PARTS = 32
+
+# First block tail() reads from the end of a CSV file; it grows 4x per retry
+TAIL_BLOCK_SIZE = 64 * 1024
+
+
+@contextmanager
+def file_lock(lock_path):
+    """Exclusive lock on lock_path across threads and processes; re-entrant per thread"""
+    held = getattr(_HELD_LOCKS, 'paths', None)
+    if held is None:
+        held = _HELD_LOCKS.paths = set()
+    if lock_path in held:
+        yield
+        return
+
+    with _THREAD_LOCKS_GUARD:
+        thread_lock = _THREAD_LOCKS.setdefault(lock_path, threading.Lock())
+    with thread_lock, open(lock_path, 'a') as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        held.add(lock_path)
+        try:
+            yield
+        finally:
+            held.discard(lock_path)
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _same_value(a, b):
+    """Cell equality where two missing values (None/NaN) count as equal"""
+    a_missing = pd.api.types.is_scalar(a) and pd.isna(a)
+    b_missing = pd.api.types.is_scalar(b) and pd.isna(b)
+    if a_missing or b_missing:
+        return a_missing and b_missing
+    try:
+        return bool(a == b)
+    except (TypeError, ValueError):
+        return False
+
+
+def merge_changes(base, mine, current):
+    """Three-way merge of a whole-table write against rows another writer saved meanwhile.
+
+    base is the table as this writer loaded it, mine is what it wants to
+    save and current is what is on disk now. Rows mine added, removed or
+    changed relative to base are replayed onto current cell by cell, so
+    concurrent edits to other rows or columns survive. Returns mine
+    unchanged when the tables share no usable key column.
+    """
+    key = next((k for k in MERGE_KEYS if k in base.columns and k in mine.columns and k in current.columns), None)
+    if key is None or base[key].duplicated().any() or mine[key].duplicated().any():
+        return mine
+
+    base_keys = set(base[key])
+    mine_keys = set(mine[key])
+    result = current[~current[key].isin(base_keys - mine_keys)].copy()
+    for column in mine.columns:
+        if column not in result.columns:
+            result[column] = np.nan
+
+    base_rows = base.set_index(key)
+    current_keys = set(result[key])
+    added = []
+    for record in mine.to_dict('records'):
+        row_key = record[key]
+        if row_key not in base_keys:
+            if row_key not in current_keys:
+                added.append(record)
+            continue
+        if row_key not in current_keys:
+            # Deleted by the other writer; their delete wins
+            continue
+
+        base_row = base_rows.loc[row_key]
+        changes = {}
+        for column, value in record.items():
+            if column == key:
+                continue
+            old = base_row[column] if column in base_row.index else np.nan
+            if not _same_value(old, value):
+                changes[column] = value
+        if changes:
+            result = apply_updates(result, result[key] == row_key, changes)
+
+    if added:
+        result = pd.concat([result, pd.DataFrame(added)], ignore_index=True)
+    return result[list(mine.columns) + [c for c in result.columns if c not in mine.columns]]
+
+
+def apply_updates(df, mask, updates):
+    """Write updates into the rows selected by mask, keeping column dtypes sane"""
+    for key, value in updates.items():
+        # Handle type conversion carefully
+        if key in df.columns:
+            try:
+                # If column has a specific dtype and value is compatible, convert
+                if df[key].dtype != 'object' and pd.notna(value):
+                    if df[key].dtype in ['int64', 'float64'] and str(value).replace('.', '').replace('-', '').isdigit():
+                        value = pd.to_numeric(value, errors='coerce')
+                df.loc[mask, key] = value
+            except (ValueError, TypeError):
+                # If conversion fails, convert column to object type
+                df[key] = df[key].astype('object')
+                df.loc[mask, key] = value
+        else:
+            df.loc[mask, key] = value
+    return df
+
+
+def update_frame(df, updates_by_id):
+    """Apply {record_id: updates} to df; returns the frame and the number of rows updated"""
+    updated = 0
+    for record_id, updates in updates_by_id.items():
+        mask = df['id'] == record_id
+        if mask.any():
+            df = apply_updates(df, mask, updates)
+            updated += int(mask.sum())
+    return df, updated
+
+
+def _where_mask(df, where):
+    """Boolean mask for {column: value} equality, or membership for list/tuple/set values"""
+    mask = pd.Series(True, index=df.index)
+    for column, value in where.items():
+        if isinstance(value, (list, tuple, set)):
+            mask &= df[column].isin(list(value))
+        else:
+            mask &= df[column] == value
+    return mask
+
+
+def _between_mask(df, between):
+    """Mask for {column: (low, high)}, inclusive and compared as strings; None leaves a side open"""
+    mask = pd.Series(True, index=df.index)
+    for column, (low, high) in between.items():
+        values = df[column].astype(str)
+        mask &= df[column].notna()
+        if low is not None:
+            mask &= values >= str(low)
+        if high is not None:
+            mask &= values <= str(high)
+    return mask
+
+
+def query_frame(df, where=None, columns=None, order_by=None, ascending=True, limit=None, between=None):
+    """Apply query() semantics to an already loaded DataFrame"""
+    where = where or {}
+    between = between or {}
+    wanted = list(columns) if columns is not None else list(df.columns)
+    if any(column not in df.columns for column in [*where, *between]):
+        return pd.DataFrame(columns=wanted)
+    order_keys = [order_by] if isinstance(order_by, str) else list(order_by or [])
+
+    df = df[_where_mask(df, where)] if where else df
+    df = df[_between_mask(df, between)] if between else df
+    if order_keys:
+        df = df.sort_values(order_keys, ascending=ascending, kind='stable')
+    if limit is not None:
+        df = df.head(limit)
+    return df[[c for c in wanted if c in df.columns]]
+
+
+def partition_base(table):
+    """Base table of a partition table name (the name itself for ordinary tables)"""
+    return table.split(PARTITION_SEPARATOR, 1)[0] or table
+
+
+def tail_frame(df, limit, where=None, before_id=None):
+    """The last limit rows of df (insertion order) matching where, with id < before_id when given"""
+    where = where or {}
+    if any(column not in df.columns for column in where):
+        return df.iloc[0:0]
+    mask = _where_mask(df, where) if where else pd.Series(True, index=df.index)
+    if before_id is not None:
+        mask &= pd.to_numeric(df['id'], errors='coerce') < before_id
+    return df[mask].tail(limit)
+
+
+class CSVStorage:
+    """One UTF-8 (BOM) CSV file per table under data_dir"""
+
+    name = 'csv'
+
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        self.lock_dir = os.path.join(data_dir, '.locks')
+        os.makedirs(self.lock_dir, exist_ok=True)
+
+    def path(self, table):
+        return os.path.join(self.data_dir, f'{table}.csv')
+
+    @contextmanager
+    def locked(self, *tables):
+        """Hold the write lock of every given table (taken in sorted order)"""
+        with ExitStack() as stack:
+            for table in sorted(set(tables)):
+                stack.enter_context(file_lock(os.path.join(self.lock_dir, f'{table}.lock')))
+            yield
+
+    @staticmethod
+    def _stat_version(stat):
+        # os.replace gives every rewrite a new inode; appends grow the size
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def version(self, table):
+        """Opaque token that changes whenever the table's file is written"""
+        if not self.exists(table):
+            return None
+        return self._stat_version(os.stat(self.path(table)))
+
+    def exists(self, table):
+        return os.path.exists(self.path(table))
+
+    def list_tables(self):
+        return sorted(f[:-4] for f in os.listdir(self.data_dir) if f.endswith('.csv'))
+
+    def size(self, table):
+        """Bytes the table takes on disk (0 when it does not exist)"""
+        return os.path.getsize(self.path(table)) if self.exists(table) else 0
+
+    def _fresh_entry(self, key, version):
+        with _TABLE_CACHE_LOCK:
+            entry = _TABLE_CACHE.get(key)
+        if entry and entry[0] == version:
+            return entry
+        return None
+
+    def read(self, table, columns=None):
+        """Return the cached DataFrame for a table, re-parsing only when the file changed.
+
+        With columns, only those are parsed (usecols) and cached as a separate
+        projection. The returned frame is shared; callers must copy it before
+        mutating.
+        """
+        return self.read_versioned(table, columns)[1]
+
+    def read_versioned(self, table, columns=None):
+        """Like read(), but also return the version token of the data read"""
+        filepath = self.path(table)
+        key = (filepath, tuple(columns) if columns is not None else None)
+        with open(filepath, 'rb') as f:
+            # Stat the open handle so the version matches the bytes parsed even
+            # if a writer swaps in a new file meanwhile
+            version = self._stat_version(os.fstat(f.fileno()))
+            entry = self._fresh_entry(key, version)
+            if entry:
+                return version, entry[1]
+            if columns is not None:
+                # A fresh full parse already holds every projection
+                entry = self._fresh_entry((filepath, None), version)
+                if entry:
+                    return version, entry[1][list(columns)]
+
+            df = pd.read_csv(f, encoding='utf-8-sig', usecols=columns)
+        if columns is not None:
+            df = df[list(columns)]
+        with _TABLE_CACHE_LOCK:
+            _TABLE_CACHE[key] = (version, df, {})
+        return version, df
+
+    def tail(self, table, limit, where=None, before_id=None):
+        """The last limit rows matching where (and id < before_id), in file order.
+
+        A cached parse answers directly. Otherwise only the end of the file
+        is read, in blocks that grow until enough matching rows turn up, so
+        the newest rows of a long append-only table cost a few KB of parsing.
+        Tails that don't look like whole records (ids not increasing, e.g. a
+        quoted field spanning lines was cut) fall back to a full read.
+        """
+        filepath = self.path(table)
+        with open(filepath, 'rb') as f:
+            version = self._stat_version(os.fstat(f.fileno()))
+            entry = self._fresh_entry((filepath, None), version)
+            if entry:
+                return tail_frame(entry[1], limit, where, before_id)
+
+            header = f.readline()
+            data_start, end = f.tell(), version[1]
+            block = TAIL_BLOCK_SIZE
+            while True:
+                start = max(data_start, end - block)
+                f.seek(start)
+                chunk = f.read(end - start)
+                if start > data_start:
+                    # The block starts mid-line; parse from the first full line
+                    chunk = chunk[chunk.find(b'\n') + 1:] if b'\n' in chunk else b''
+                try:
+                    df = pd.read_csv(io.BytesIO(header + chunk), encoding='utf-8-sig')
+                except (pd.errors.ParserError, UnicodeDecodeError):
+                    df = None
+                if start == data_start and df is not None:
+                    return tail_frame(df, limit, where, before_id)
+                if df is None or ('id' in df.columns and not pd.to_numeric(df['id'], errors='coerce').is_monotonic_increasing):
+                    break
+                rows = tail_frame(df, limit, where, before_id)
+                if len(rows) >= limit:
+                    return rows
+                block *= 4
+        return tail_frame(self.read(table), limit, where, before_id)
+
+    def _row_positions(self, table, column, value):
+        """Full table plus the row positions whose column equals value (or is in it)"""
+        filepath = self.path(table)
+        df = self.read(table)
+        with _TABLE_CACHE_LOCK:
+            entry = _TABLE_CACHE.get((filepath, None))
+            indexes = entry[2] if entry and entry[1] is df else {}
+            index = indexes.get(column)
+        if index is None:
+            index = df.groupby(column, sort=False).indices
+            with _TABLE_CACHE_LOCK:
+                indexes[column] = index
+
+        values = value if isinstance(value, (list, tuple, set)) else [value]
+        found = [index[v] for v in values if v in index]
+        positions = np.sort(np.concatenate(found)) if found else np.array([], dtype=np.intp)
+        return df, positions
+
+    def query(self, table, where=None, columns=None, order_by=None, ascending=True, limit=None, between=None):
+        """Filtered read: equality/membership predicates, ranges, projection, sort and limit.
+
+        A predicate on a hash-indexed column jumps straight to the matching
+        rows, so per-user lookups cost the user's row count, not the table's.
+        """
+        header = self.columns(table)
+        where = where or {}
+        between = between or {}
+        wanted = list(columns) if columns is not None else list(header)
+        if any(column not in header for column in [*where, *between]):
+            return pd.DataFrame(columns=wanted)
+        order_keys = [order_by] if isinstance(order_by, str) else list(order_by or [])
+
+        indexed = next((c for c in where if c in HASH_INDEXED_COLUMNS), None)
+        if indexed:
+            df, positions = self._row_positions(table, indexed, where[indexed])
+            df = df.take(positions)
+            rest = {c: v for c, v in where.items() if c != indexed}
+        else:
+            needed = [c for c in header if c in wanted or c in where or c in order_keys or c in between]
+            df = self.read(table, needed if columns is not None else None)
+            rest = where
+        return query_frame(df, rest, wanted, order_keys, ascending, limit, between)
+
+    def invalidate(self, table=None):
+        """Drop cached tables (all of them when table is None)"""
+        with _TABLE_CACHE_LOCK:
+            if table is None:
+                _TABLE_CACHE.clear()
+                return
+            filepath = self.path(table)
+            for key in [key for key in _TABLE_CACHE if key[0] == filepath]:
+                del _TABLE_CACHE[key]
+
+    def columns(self, table):
+        """Column names from the header line, without parsing any rows"""
+        if not self.exists(table):
+            return []
+        with open(self.path(table), 'r', encoding='utf-8-sig', newline='') as f:
+            return next(csv.reader(f), [])
+
+    def write(self, table, df):
+        self.write_many({table: df})
+
+    def write_many(self, tables):
+        """Rewrite several tables so that readers only ever see complete files.
+
+        Every table is first written and fsynced to a temp file next to it;
+        only once all of them succeeded are they swapped in with os.replace.
+        """
+        staged = []
+        with self.locked(*tables):
+            try:
+                for table, df in tables.items():
+                    staged.append((table, *self._stage_write(table, df)))
+            except BaseException:
+                for _, tmp_path, _ in staged:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                raise
+
+            for table, tmp_path, final_path in staged:
+                self._commit_write(table, tmp_path, final_path)
+                self.invalidate(table)
+
+    def _stage_write(self, table, df):
+        """Write df to a fsynced temp file; returns (temp path, path to swap it to)"""
+        filepath = self.path(table)
+        tmp_path = f'{filepath}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8-sig', newline='') as f:
+                df.to_csv(f, index=False)
+                f.flush()
+                os.fsync(f.fileno())
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return tmp_path, filepath
+
+    def _commit_write(self, table, tmp_path, final_path):
+        os.replace(tmp_path, final_path)
+
+    def append(self, table, records):
+        """Append records to the end of an existing CSV file.
+
+        Returns False without touching the file when it does not exist yet or
+        the records carry columns the header does not have, so the caller can
+        fall back to a full rewrite.
+        """
+        filepath = self.path(table)
+        with self.locked(table):
+            columns = self.columns(table)
+            if not columns or any(key not in columns for record in records for key in record):
+                return False
+
+            rows = pd.DataFrame(records, columns=columns)
+            chunk = rows.to_csv(header=False, index=False, lineterminator='\n')
+            with open(filepath, 'rb') as f:
+                version = self._stat_version(os.fstat(f.fileno()))
+                # Keep the new rows on their own line if the file lacks a trailing newline
+                f.seek(0, os.SEEK_END)
+                if f.tell() > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b'\n':
+                        chunk = '\n' + chunk
+            cached = self._fresh_entry((filepath, None), version)
+
+            # The BOM is only ever written at the start of the file by write()
+            with open(filepath, 'a', encoding='utf-8', newline='') as f:
+                f.write(chunk)
+
+            self.invalidate(table)
+            if cached and len(cached[1]):
+                # The lock guarantees nobody else wrote in between: extend the
+                # cached table and its row indexes instead of re-parsing later
+                new_rows = pd.read_csv(io.StringIO(chunk), header=None, names=columns)
+                self._extend_cache(filepath, cached, new_rows, self.version(table))
+        return True
+
+    @staticmethod
+    def _extend_cache(filepath, cached, new_rows, version):
+        df = cached[1]
+        offset = len(df)
+        combined = pd.concat([df, new_rows], ignore_index=True)
+
+        indexes = {}
+        for column, index in cached[2].items():
+            index = dict(index)
+            for value, group in new_rows.groupby(column, sort=False).indices.items():
+                added = group + offset
+                index[value] = np.concatenate([index[value], added]) if value in index else added
+            indexes[column] = index
+
+        with _TABLE_CACHE_LOCK:
+            _TABLE_CACHE[(filepath, None)] = (version, combined, indexes)
+
+    def update(self, table, record_id, updates):
+        return self.update_many(table, {record_id: updates}) > 0
+
+    def update_many(self, table, updates_by_id):
+        """Apply {record_id: updates} with one read and one rewrite; returns rows updated"""
+        with self.locked(table):
+            df = self.read(table).copy()
+            if df.empty:
+                return 0
+
+            df, updated = update_frame(df, updates_by_id)
+            if updated:
+                self.write(table, df)
+        return updated
+
+    def delete(self, table, record_id):
+        self.delete_many(table, [record_id])
+        return True
+
+    def delete_many(self, table, record_ids):
+        """Remove every row whose id is in record_ids with one rewrite; returns rows deleted"""
+        with self.locked(table):
+            df = self.read(table)
+            keep = ~df['id'].isin(list(record_ids))
+            self.write(table, df[keep])
+        return int((~keep).sum())
+
+
+class ColumnarStorage(CSVStorage):
+    """CSV tables, except COLUMNAR_TABLES (and their partitions) which live as Parquet part files.
+
+    data/<table>.parquet/ holds one generation of immutable part files named
+    <generation>-<part>.parquet. A rewrite starts a new generation with a
+    single file (swapped in with os.replace, older generations removed), an
+    append adds a part, and PARQUET_MAX_PARTS parts are compacted back into
+    one file. Reads parse only the requested columns, and a `between` range
+    skips row groups whose min/max statistics fall outside it.
+    """
+
+    name = 'columnar'
+
+    def __init__(self, data_dir):
+        super().__init__(data_dir)
+        for table in super().list_tables():
+            if self._columnar(table):
+                self._convert_csv(table)
+
+    @staticmethod
+    def _columnar(table):
+        return partition_base(table) in COLUMNAR_TABLES
+
+    def _convert_csv(self, table):
+        """One-time move of an existing <table>.csv into Parquet"""
+        csv_path = super().path(table)
+        if not os.path.exists(csv_path):
+            return
+        with self.locked(table):
+            if os.path.exists(csv_path) and not self.exists(table):
+                self.write(table, pd.read_csv(csv_path, encoding='utf-8-sig'))
+                os.replace(csv_path, csv_path + '.migrated')
+
+    def path(self, table):
+        if self._columnar(table):
+            return os.path.join(self.data_dir, f'{table}.parquet')
+        return super().path(table)
+
+    def _current_parts(self, table):
+        """(version, part paths) of the table's current generation; version is None when it has none"""
+        dirpath = self.path(table)
+        try:
+            names = [n for n in os.listdir(dirpath) if n.endswith('.parquet') and not n.startswith('.')]
+        except FileNotFoundError:
+            return None, []
+        if not names:
+            return None, []
+        generation = max(int(n.split('-')[0]) for n in names)
+        parts = sorted(n for n in names if int(n.split('-')[0]) == generation)
+        return (generation, tuple(parts)), [os.path.join(dirpath, n) for n in parts]
+
+    def exists(self, table):
+        if self._columnar(table):
+            return self._current_parts(table)[0] is not None
+        return super().exists(table)
+
+    def version(self, table):
+        if self._columnar(table):
+            return self._current_parts(table)[0]
+        return super().version(table)
+
+    def list_tables(self):
+        parquet_tables = {
+            name[:-len('.parquet')] for name in os.listdir(self.data_dir) if name.endswith('.parquet')
+        }
+        return sorted(set(super().list_tables()) | {
+            table for table in parquet_tables if self._columnar(table) and self.exists(table)
+        })
+
+    def tail(self, table, limit, where=None, before_id=None):
+        if not self._columnar(table):
+            return super().tail(table, limit, where, before_id)
+        # Parts are column-compressed and cached whole, so there is no cheap byte tail to read
+        return tail_frame(self.read(table), limit, where, before_id)
+
+    def size(self, table):
+        if not self._columnar(table):
+            return super().size(table)
+        return sum(os.path.getsize(path) for path in self._current_parts(table)[1])
+
+    def columns(self, table):
+        if not self._columnar(table):
+            return super().columns(table)
+        paths = self._current_parts(table)[1]
+        return pq.read_schema(paths[0]).names if paths else []
+
+    @staticmethod
+    def _row_group_overlaps(row_group, between):
+        """False only when min/max statistics prove no row of the group is in range"""
+        for i in range(row_group.num_columns):
+            chunk = row_group.column(i)
+            if chunk.path_in_schema not in between:
+                continue
+            stats = chunk.statistics
+            if stats is None or not stats.has_min_max or not isinstance(stats.min, str):
+                continue
+            low, high = between[chunk.path_in_schema]
+            if low is not None and stats.max < str(low):
+                return False
+            if high is not None and stats.min > str(high):
+                return False
+        return True
+
+    def _read_parts(self, table, columns=None, between=None):
+        """(version, frame) read from the current part files, retrying if a rewrite removes them mid-read"""
+        for attempt in range(3):
+            version, paths = self._current_parts(table)
+            try:
+                frames = []
+                for path in paths:
+                    parquet_file = pq.ParquetFile(path)
+                    groups = list(range(parquet_file.num_row_groups))
+                    if between:
+                        groups = [g for g in groups if self._row_group_overlaps(parquet_file.metadata.row_group(g), between)]
+                    if groups:
+                        frames.append(parquet_file.read_row_groups(groups, columns=columns).to_pandas())
+                break
+            except FileNotFoundError:
+                if attempt == 2:
+                    raise
+
+        if not frames:
+            header = pq.read_schema(paths[0]).names if paths else []
+            return version, pd.DataFrame(columns=list(columns) if columns is not None else header)
+        return version, pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+    def read_versioned(self, table, columns=None):
+        if not self._columnar(table):
+            return super().read_versioned(table, columns)
+        dirpath = self.path(table)
+        key = (dirpath, tuple(columns) if columns is not None else None)
+        version = self.version(table)
+        entry = self._fresh_entry(key, version)
+        if entry:
+            return version, entry[1]
+        if columns is not None:
+            entry = self._fresh_entry((dirpath, None), version)
+            if entry:
+                return version, entry[1][list(columns)]
+
+        version, df = self._read_parts(table, list(columns) if columns is not None else None)
+        with _TABLE_CACHE_LOCK:
+            _TABLE_CACHE[key] = (version, df, {})
+        return version, df
+
+    def query(self, table, where=None, columns=None, order_by=None, ascending=True, limit=None, between=None):
+        """Like CSVStorage.query; a range additionally prunes Parquet row groups"""
+        if not self._columnar(table) or not between:
+            return super().query(table, where, columns, order_by, ascending, limit, between)
+
+        header = self.columns(table)
+        where = where or {}
+        wanted = list(columns) if columns is not None else list(header)
+        if any(column not in header for column in [*where, *between]):
+            return pd.DataFrame(columns=wanted)
+        order_keys = [order_by] if isinstance(order_by, str) else list(order_by or [])
+
+        needed = [c for c in header if c in wanted or c in where or c in order_keys or c in between]
+        df = self._read_parts(table, needed, between)[1]
+        return query_frame(df, where, wanted, order_keys, ascending, limit, between)
+
+    @staticmethod
+    def _write_parquet(df, path):
+        try:
+            arrow_table = pa.Table.from_pandas(df, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Mixed-type object columns (e.g. ints and strings): store them as text
+            df = df.copy()
+            for column in df.columns[df.dtypes == object]:
+                df[column] = df[column].where(df[column].isna(), df[column].astype(str))
+            arrow_table = pa.Table.from_pandas(df, preserve_index=False)
+        with open(path, 'wb') as f:
+            pq.write_table(arrow_table, f, row_group_size=PARQUET_ROW_GROUP_SIZE)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _stage_write(self, table, df):
+        if not self._columnar(table):
+            return super()._stage_write(table, df)
+        dirpath = self.path(table)
+        os.makedirs(dirpath, exist_ok=True)
+        version = self.version(table)
+        name = f'{(version[0] + 1) if version else 1:08d}-0000.parquet'
+        tmp_path = os.path.join(dirpath, f'.{name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        try:
+            self._write_parquet(df, tmp_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return tmp_path, os.path.join(dirpath, name)
+
+    def _commit_write(self, table, tmp_path, final_path):
+        super()._commit_write(table, tmp_path, final_path)
+        if not self._columnar(table):
+            return
+        # Readers still holding an old part open keep reading it; new readers
+        # only list the new generation
+        generation = os.path.basename(final_path).split('-')[0]
+        for name in os.listdir(os.path.dirname(final_path)):
+            if name.endswith('.parquet') and not name.startswith(generation + '-') and not name.startswith('.'):
+                try:
+                    os.remove(os.path.join(os.path.dirname(final_path), name))
+                except FileNotFoundError:
+                    pass
+
+    def append(self, table, records):
+        """Add the records as a new part file (compacting once there are too many)"""
+        if not self._columnar(table):
+            return super().append(table, records)
+
+        dirpath = self.path(table)
+        with self.locked(table):
+            columns = self.columns(table)
+            if not columns or any(key not in columns for record in records for key in record):
+                return False
+
+            rows = pd.DataFrame(records, columns=columns)
+            version, paths = self._current_parts(table)
+            if len(paths) >= PARQUET_MAX_PARTS:
+                self.write(table, pd.concat([self.read(table), rows], ignore_index=True))
+                return True
+
+            last_part = int(os.path.basename(paths[-1]).split('-')[1].split('.')[0])
+            name = f'{version[0]:08d}-{last_part + 1:04d}.parquet'
+            tmp_path = os.path.join(dirpath, f'.{name}.{os.getpid()}.{threading.get_ident()}.tmp')
+            try:
+                self._write_parquet(rows, tmp_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            os.replace(tmp_path, os.path.join(dirpath, name))
+
+            cached = self._fresh_entry((dirpath, None), version)
+            self.invalidate(table)
+            if cached and len(cached[1]):
+                # Read the part back so the cached frame gets the same dtypes a full read would
+                new_rows = pq.read_table(os.path.join(dirpath, name)).to_pandas()
+                self._extend_cache(dirpath, cached, new_rows, self.version(table))
+        return True
+
+
+class SQLiteStorage:
+    """All tables in one SQLite database in WAL mode, indexed on lookup columns"""
+
+    name = 'sqlite'
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.lock_dir = os.path.join(os.path.dirname(os.path.abspath(db_path)), '.locks')
+        os.makedirs(self.lock_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            # Per-table write counters backing version()
+            conn.execute(
+                f'CREATE TABLE IF NOT EXISTS {VERSIONS_TABLE} (name TEXT PRIMARY KEY, version INTEGER NOT NULL)'
+            )
+
+    @contextmanager
+    def _connect(self):
+        # A short-lived connection per call keeps Streamlit's session threads apart
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute('PRAGMA synchronous=NORMAL')
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _quote(identifier):
+        return '"' + str(identifier).replace('"', '""') + '"'
+
+    @staticmethod
+    def _to_sql_value(value):
+        """Convert pandas/numpy scalars into something sqlite3 can bind"""
+        if isinstance(value, (list, dict, tuple, set)):
+            return str(value)
+        if value is None or (not isinstance(value, str) and pd.isna(value)):
+            return None
+        if isinstance(value, (bool, np.bool_)):
+            # Stored as text like the CSV files, so TEXT columns don't end up with '0'/'1'
+            return str(bool(value))
+        if isinstance(value, np.generic):
+            return value.item()
+        if isinstance(value, (pd.Timestamp, datetime)):
+            return value.strftime('%Y-%m-%d %H:%M:%S')
+        if isinstance(value, date):
+            return value.isoformat()
+        return value
+
+    @staticmethod
+    def _restore_booleans(df):
+        """Turn 'True'/'False' text columns back into booleans, as read_csv infers them"""
+        for column in df.columns[df.dtypes == object]:
+            values = df[column].dropna()
+            if not values.empty and values.isin(['True', 'False']).all():
+                df[column] = df[column].map({'True': True, 'False': False})
+        return df
+
+    @contextmanager
+    def locked(self, *tables):
+        """Hold the write lock of every given table (taken in sorted order)"""
+        with ExitStack() as stack:
+            for table in sorted(set(tables)):
+                stack.enter_context(file_lock(os.path.join(self.lock_dir, f'{table}.lock')))
+            yield
+
+    def _bump_versions(self, conn, tables):
+        conn.executemany(
+            f'INSERT INTO {VERSIONS_TABLE} (name, version) VALUES (?, 1) '
+            'ON CONFLICT(name) DO UPDATE SET version = version + 1',
+            [(table,) for table in tables],
+        )
+
+    def _version(self, conn, table):
+        row = conn.execute(f'SELECT version FROM {VERSIONS_TABLE} WHERE name = ?', (table,)).fetchone()
+        return row[0] if row else 0
+
+    def version(self, table):
+        """Counter bumped by every write to the table"""
+        with self._connect() as conn:
+            return self._version(conn, table)
+
+    def exists(self, table):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)
+            ).fetchone()
+        return row is not None
+
+    def list_tables(self):
+        # Internal tables (staging, version counters) all start with '__'
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' "
+                "AND name NOT GLOB 'sqlite_*' AND name NOT GLOB '__*' ORDER BY name"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def size(self, table):
+        """Bytes of the table's and its indexes' pages, or None when SQLite lacks dbstat"""
+        with self._connect() as conn:
+            try:
+                row = conn.execute(
+                    "SELECT SUM(pgsize) FROM dbstat WHERE name IN "
+                    "(SELECT name FROM sqlite_master WHERE tbl_name = ?)", (table,)
+                ).fetchone()
+            except sqlite3.OperationalError:
+                return None
+        return row[0] or 0
+
+    def read(self, table):
+        with self._connect() as conn:
+            return self._restore_booleans(pd.read_sql_query(f'SELECT * FROM {self._quote(table)}', conn))
+
+    def read_versioned(self, table):
+        """Like read(), but also return the version of the data read"""
+        with self._connect() as conn:
+            # One read transaction so the version matches the rows (WAL snapshot)
+            conn.execute('BEGIN')
+            version = self._version(conn, table)
+            df = pd.read_sql_query(f'SELECT * FROM {self._quote(table)}', conn)
+        return version, self._restore_booleans(df)
+
+    def query(self, table, where=None, columns=None, order_by=None, ascending=True, limit=None, between=None):
+        """Filtered read pushed down to SQL so indexes on the where columns apply"""
+        header = self.columns(table)
+        where = where or {}
+        between = between or {}
+        wanted = list(columns) if columns is not None else list(header)
+        if any(column not in header for column in [*where, *between]):
+            return pd.DataFrame(columns=wanted)
+        order_keys = [order_by] if isinstance(order_by, str) else list(order_by or [])
+
+        select_sql = ', '.join(self._quote(c) for c in wanted if c in header) or '*'
+        sql = f'SELECT {select_sql} FROM {self._quote(table)}'
+        if any(isinstance(v, (list, tuple, set)) and not v for v in where.values()):
+            return pd.DataFrame(columns=wanted)
+        clauses, params = self._where_sql(where)
+        for column, (low, high) in between.items():
+            clauses.append(f'{self._quote(column)} IS NOT NULL')
+            if low is not None:
+                clauses.append(f'{self._quote(column)} >= ?')
+                params.append(str(low))
+            if high is not None:
+                clauses.append(f'{self._quote(column)} <= ?')
+                params.append(str(high))
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        if order_keys:
+            direction = 'ASC' if ascending else 'DESC'
+            sql += ' ORDER BY ' + ', '.join(f'{self._quote(c)} {direction}' for c in order_keys)
+            # rowid keeps ties in insertion order, matching the stable CSV sort
+            sql += ', rowid ASC'
+        if limit is not None:
+            sql += f' LIMIT {int(limit)}'
+
+        with self._connect() as conn:
+            return self._restore_booleans(pd.read_sql_query(sql, conn, params=params))
+
+    def _where_sql(self, where):
+        """WHERE clauses and their parameters for {column: value or list of values}"""
+        clauses, params = [], []
+        for column, value in where.items():
+            if isinstance(value, (list, tuple, set)):
+                values = list(value)
+                clauses.append(f'{self._quote(column)} IN ({", ".join("?" for _ in values)})')
+                params.extend(self._to_sql_value(v) for v in values)
+            else:
+                clauses.append(f'{self._quote(column)} = ?')
+                params.append(self._to_sql_value(value))
+        return clauses, params
+
+    def tail(self, table, limit, where=None, before_id=None):
+        """The last limit rows matching where (and id < before_id), in insertion order"""
+        header = self.columns(table)
+        where = where or {}
+        if any(column not in header for column in where):
+            return pd.DataFrame(columns=header)
+        clauses, params = self._where_sql(where)
+        if before_id is not None:
+            clauses.append('"id" < ?')
+            params.append(self._to_sql_value(before_id))
+        sql = f'SELECT * FROM {self._quote(table)}'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += f' ORDER BY rowid DESC LIMIT {int(limit)}'
+        with self._connect() as conn:
+            df = self._restore_booleans(pd.read_sql_query(sql, conn, params=params))
+        return df.iloc[::-1].reset_index(drop=True)
+
+    def invalidate(self, table=None):
+        """SQLite reads are never cached"""
+
+    def columns(self, table):
+        with self._connect() as conn:
+            rows = conn.execute(f'PRAGMA table_info({self._quote(table)})').fetchall()
+        return [row[1] for row in rows]
+
+    def _create_indexes(self, conn, table, columns):
+        for column in INDEXED_COLUMNS:
+            if column in columns:
+                conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS {self._quote(f"ix_{table}_{column}")} '
+                    f'ON {self._quote(table)} ({self._quote(column)})'
+                )
+
+    def write(self, table, df):
+        self.write_many({table: df})
+
+    def write_many(self, tables):
+        """Replace several tables in a single transaction.
+
+        to_sql commits on its own, so each frame is loaded into a staging
+        table first and the staged tables are swapped in together.
+        """
+        with self._connect() as conn:
+            staged = []
+            for table, df in tables.items():
+                stage = f'__stage_{table}_{os.getpid()}_{threading.get_ident()}'
+                # An empty frame would otherwise create a TEXT id column, which sorts '10' before '9'
+                dtype = {'id': 'INTEGER'} if 'id' in df.columns else None
+                # to_sql would store booleans as 0/1; keep the 'True'/'False' text append() writes
+                bool_columns = [
+                    c for c in df.columns
+                    if df[c].dtype == bool or (df[c].dtype == object and df[c].map(type).eq(bool).any())
+                ]
+                if bool_columns:
+                    df = df.copy()
+                    for c in bool_columns:
+                        df[c] = df[c].map(self._to_sql_value)
+                df.to_sql(stage, conn, if_exists='replace', index=False, dtype=dtype)
+                staged.append((table, stage, list(df.columns)))
+
+            conn.execute('BEGIN IMMEDIATE')
+            for table, stage, columns in staged:
+                conn.execute(f'DROP TABLE IF EXISTS {self._quote(table)}')
+                conn.execute(f'ALTER TABLE {self._quote(stage)} RENAME TO {self._quote(table)}')
+                self._create_indexes(conn, table, columns)
+            self._bump_versions(conn, tables)
+
+    def append(self, table, records):
+        # Under the table lock, so it can't land between a snapshot check and write_many
+        with self.locked(table):
+            columns = self.columns(table)
+            if not columns or any(key not in columns for record in records for key in record):
+                return False
+
+            placeholders = ', '.join('?' for _ in columns)
+            column_sql = ', '.join(self._quote(c) for c in columns)
+            rows = [[self._to_sql_value(record.get(c)) for c in columns] for record in records]
+            with self._connect() as conn:
+                conn.executemany(
+                    f'INSERT INTO {self._quote(table)} ({column_sql}) VALUES ({placeholders})', rows
+                )
+                self._bump_versions(conn, [table])
+        return True
+
+    def update(self, table, record_id, updates):
+        return self.update_many(table, {record_id: updates}) > 0
+
+    def update_many(self, table, updates_by_id):
+        """Apply {record_id: updates} in one transaction; returns rows updated"""
+        updated = 0
+        with self.locked(table):
+            columns = self.columns(table)
+            with self._connect() as conn:
+                for record_id, updates in updates_by_id.items():
+                    if not updates:
+                        continue
+                    for key in updates:
+                        if key not in columns:
+                            conn.execute(f'ALTER TABLE {self._quote(table)} ADD COLUMN {self._quote(key)}')
+                            columns.append(key)
+                    assignments = ', '.join(f'{self._quote(key)} = ?' for key in updates)
+                    params = [self._to_sql_value(v) for v in updates.values()] + [self._to_sql_value(record_id)]
+                    cursor = conn.execute(f'UPDATE {self._quote(table)} SET {assignments} WHERE "id" = ?', params)
+                    updated += cursor.rowcount
+                if updated:
+                    self._bump_versions(conn, [table])
+        return updated
+
+    def delete(self, table, record_id):
+        self.delete_many(table, [record_id])
+        return True
+
+    def delete_many(self, table, record_ids):
+        """Remove every row whose id is in record_ids in one statement; returns rows deleted"""
+        record_ids = [self._to_sql_value(record_id) for record_id in record_ids]
+        if not record_ids:
+            return 0
+        placeholders = ', '.join('?' for _ in record_ids)
+        with self.locked(table), self._connect() as conn:
+            cursor = conn.execute(f'DELETE FROM {self._quote(table)} WHERE "id" IN ({placeholders})', record_ids)
+            if cursor.rowcount:
+                self._bump_versions(conn, [table])
+        return cursor.rowcount
+
+
+def create_storage(backend, data_dir):
+    """Build the storage engine named by backend ('csv', 'columnar' or 'sqlite')"""
+    if backend == 'columnar':
+        if pq is None:
+            raise ImportError("The columnar storage engine needs pyarrow: pip install 'pyarrow>=15'")
+        return ColumnarStorage(data_dir)
+    if backend == 'sqlite':
+        db_path = os.environ.get('CLUBSYSTEM_DB_PATH', os.path.join(data_dir, 'clubsystem.db'))
+        return SQLiteStorage(db_path)
+    return CSVStorage(data_dir)
+
+
+def migrate_csv_to_sqlite(data_dir='data', db_path=None):
+    """Copy every data/*.csv table into a SQLite database, replacing existing tables"""
+    source = CSVStorage(data_dir)
+    target = SQLiteStorage(db_path or os.path.join(data_dir, 'clubsystem.db'))
+
+    migrated = {}
+    for table in source.list_tables():
+        df = source.read(table)
+        target.write(table, df)
+        migrated[table] = len(df)
+    return migrated
+
+
+if __name__ == '__main__':
+    # python storage_backends.py migrate [data_dir] [db_path]
+    if len(sys.argv) < 2 or sys.argv[1] != 'migrate':
+        print('usage: python storage_backends.py migrate [data_dir] [db_path]')
+        sys.exit(1)
+
+    data_dir = sys.argv[2] if len(sys.argv) > 2 else 'data'
+    db_path = sys.argv[3] if len(sys.argv) > 3 else None
+    for table, row_count in migrate_csv_to_sqlite(data_dir, db_path).items():
+        print(f'{table}: {row_count} rows')
@@ -1,6 +1,16 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
+from streamlit.errors import StreamlitAPIException
+
+
+def rerun_fragment():
+    """Rerun only the enclosing @st.fragment, or the whole app outside a fragment rerun"""
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        # scope="fragment" is rejected while the fragment runs as part of a full rerun
+        st.rerun()
 
 class UIComponents:
     def __init__(self):
@@ -8,20 +8,11 @@ class VideoConferenceSystem:
         self.data_manager = None
     
     def initialize_conference_files(self):
-        """Initialize video conference CSV files"""
+        """Bind the data manager (video_conferences.csv is created by DataManager.bootstrap)"""
         if not hasattr(st.session_state, 'data_manager'):
             return
         
         self.data_manager = st.session_state.data_manager
-        
-        # Conference CSV structure
-        conference_headers = ['id', 'title', 'description', 'club', 'organizer', 'meeting_url', 'password', 'scheduled_date', 'duration', 'status', 'participants', 'created_date']
-        
-        # Initialize if not exists
-        conference_df = self.data_manager.load_csv('video_conferences')
-        if conference_df.empty:
-            conference_df = pd.DataFrame(columns=conference_headers)
-            self.data_manager.save_csv('video_conferences', conference_df)
     
     def show_conference_interface(self, user):
         """Display the video conference interface"""
@@ -1,30 +1,13 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime, date, timedelta
-import plotly.express as px
-import plotly.graph_objects as go
-import json, timedelta
 import json
+from ui_components import rerun_fragment
 
 class VoteSystem:
     def __init__(self):
         self.votes_file = 'data/votes.csv'
         self.vote_responses_file = 'data/vote_responses.csv'
-        self.initialize_vote_files()
-
-    def initialize_vote_files(self):
-        """Initialize vote-related CSV files"""
-        # Initialize votes.csv
-        if not st.session_state.data_manager.load_csv('votes').empty is False:
-            votes_structure = ['id', 'title', 'description', 'options', 'club', 'creator', 'end_date', 'status', 'allow_multiple', 'created_date']
-            empty_df = pd.DataFrame(columns=votes_structure)
-            st.session_state.data_manager.save_csv('votes', empty_df)
-
-        # Initialize vote_responses.csv
-        if not st.session_state.data_manager.load_csv('vote_responses').empty is False:
-            responses_structure = ['id', 'vote_id', 'username', 'selected_options', 'voted_date']
-            empty_df = pd.DataFrame(columns=responses_structure)
-            st.session_state.data_manager.save_csv('vote_responses', empty_df)
 
     def show_vote_interface(self, user):
         """Display the vote interface"""
@@ -97,8 +80,9 @@ class VoteSystem:
         if active_votes.empty and ended_votes.empty:
             st.info("참여할 수 있는 투표가 없습니다.")
 
+    @st.fragment
     def show_vote_card(self, vote, user, is_active=True):
-        """Display a single vote card"""
+        """Display a single vote card; voting and result toggles rerun only this card"""
         # Calculate time until end
         end_date = pd.to_datetime(vote['end_date'])
         now = datetime.now()
@@ -186,7 +170,7 @@ class VoteSystem:
                         if selected_options:
                             if self.submit_vote(vote['id'], user['username'], selected_options):
                                 st.success("투표가 완료되었습니다!")
-                                st.rerun()
+                                rerun_fragment()
                             else:
                                 st.error("투표 제출에 실패했습니다.")
                         else:
@@ -217,6 +201,7 @@ class VoteSystem:
                         if st.button("🔒 종료", key=f"end_vote_{vote['id']}"):
                             if self.end_vote(vote['id']):
                                 st.success("투표가 종료되었습니다.")
+                                # The card moves to the ended list, so redraw the whole page
                                 st.rerun()
 
             with col4:
@@ -305,16 +290,21 @@ class VoteSystem:
                         'created_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                     }
 
-                    if st.session_state.data_manager.add_record('votes', vote_data):
+                    # Vote row and its broadcast are written together
+                    with st.session_state.data_manager.transaction():
+                        created = st.session_state.data_manager.add_record('votes', vote_data)
+                        if created:
+                            # Add notification
+                            st.session_state.notification_system.add_notification(
+                                f"새 투표: {title}",
+                                "info",
+                                "all",
+                                f"{user['name']}님이 새 투표를 등록했습니다. 마감일: {end_date}"
+                            )
+
+                    if created:
                         st.success("투표가 생성되었습니다!")
                         st.session_state.vote_options = []  # Clear options
-                        # Add notification
-                        st.session_state.notification_system.add_notification(
-                            f"새 투표: {title}",
-                            "info",
-                            "all",
-                            f"{user['name']}님이 새 투표를 등록했습니다. 마감일: {end_date}"
-                        )
                         st.rerun()
                     else:
                         st.error("투표 생성에 실패했습니다.")
@@ -406,7 +396,7 @@ class VoteSystem:
 
         if st.button("❌ 결과 닫기", key=f"close_results_{vote['id']}"):
             st.session_state[f'show_vote_results_{vote["id"]}'] = False
-            st.rerun()
+            rerun_fragment()
 
     def show_vote_analytics(self, user):
         """Display vote analytics for managers"""
@@ -624,16 +614,21 @@ class VoteSystem:
                         'created_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                     }
 
-                    if st.session_state.data_manager.add_record('votes', vote_data):
+                    # Vote row and its broadcast are written together
+                    with st.session_state.data_manager.transaction():
+                        created = st.session_state.data_manager.add_record('votes', vote_data)
+                        if created:
+                            # Add notification
+                            st.session_state.notification_system.add_notification(
+                                f"새 투표: {title}",
+                                "info",
+                                "all",
+                                f"{user['name']}님이 새 투표를 등록했습니다. 마감일: {end_date}"
+                            )
+
+                    if created:
                         st.success("투표가 생성되었습니다!")
                         st.session_state.vote_options = []  # Clear options
-                        # Add notification
-                        st.session_state.notification_system.add_notification(
-                            f"새 투표: {title}",
-                            "info",
-                            "all",
-                            f"{user['name']}님이 새 투표를 등록했습니다. 마감일: {end_date}"
-                        )
                         st.rerun()
                     else:
                         st.error("투표 생성에 실패했습니다.")
@@ -717,16 +712,21 @@ class VoteSystem:
                         'created_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                     }
 
-                    if st.session_state.data_manager.add_record('votes', vote_data):
+                    # Vote row and its broadcast are written together
+                    with st.session_state.data_manager.transaction():
+                        created = st.session_state.data_manager.add_record('votes', vote_data)
+                        if created:
+                            # Add notification
+                            st.session_state.notification_system.add_notification(
+                                f"새 투표: {title}",
+                                "info",
+                                "all",
+                                f"{user['name']}님이 새 투표를 등록했습니다. 마감일: {end_date}"
+                            )
+
+                    if created:
                         st.success("투표가 생성되었습니다!")
                         st.session_state.vote_options = []  # Clear options
-                        # Add notification
-                        st.session_state.notification_system.add_notification(
-                            f"새 투표: {title}",
-                            "info",
-                            "all",
-                            f"{user['name']}님이 새 투표를 등록했습니다. 마감일: {end_date}"
-                        )
                         st.rerun()
                     else:
                         st.error("투표 생성에 실패했습니다.")
@@ -831,7 +831,7 @@ class VoteSystem:
 
         if st.button("❌ 결과 닫기", key=f"close_results_{vote['id']}"):
             st.session_state[f'show_vote_results_{vote["id"]}'] = False
-            st.rerun()
+            rerun_fragment()
 
     def show_vote_analytics(self, user):
         """Display vote analytics for managers"""